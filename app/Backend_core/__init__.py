@@ -3,10 +3,7 @@ Backend_core package for AQI Analyser application.
 Contains data fetching, analysis, and model classes.
 """
 
-from .fetcher import AQIFetcher
-from .analysis import AQIAnalysis
-from .historical_analyzer import HistoricalAnalyzer
-from .models import City, RealTimeAQIData, AQIData
+import importlib
 
 __all__ = [
     'AQIFetcher',
@@ -15,4 +12,24 @@ __all__ = [
     'City',
     'RealTimeAQIData',
     'AQIData'
-]
\ No newline at end of file
+]
+
+
+_EXPORTS = {
+    'AQIFetcher': '.fetcher',
+    'AQIAnalysis': '.analysis',
+    'HistoricalAnalyzer': '.historical_analyzer',
+    'City': '.models',
+    'RealTimeAQIData': '.models',
+    'AQIData': '.models'
+}
+
+
+def __getattr__(name):
+    # Every export loads on first use: HistoricalAnalyzer pulls in pandas and
+    # AQIAnalysis pulls in flet, so the real-time views start without the
+    # scientific stack and dataana (Backend_core.numeric) without the UI.
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
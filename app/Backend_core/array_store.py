@@ -0,0 +1,127 @@
+# app/Backend_core/array_store.py
+"""
+Persistent city x hour x pollutant array for the cleaned hourly data.
+
+The values live in a single float32 .npy file that is opened with
+mmap_mode='r', so several processes share it through the OS page cache and
+opening it costs only the metadata read. A small JSON sidecar holds the axis
+labels (cities, start time, pollutants).
+"""
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .grid import dense_city_hour_array, grid_axes
+from .ingest import POLLUTANTS, stream_city_hourly
+
+DATA_FILE = "hourly.npy"
+META_FILE = "meta.json"
+
+
+class HourlyArrayStore:
+    """
+    Read-only view over a stored (n_cities, n_hours, n_pollutants) array.
+    Missing hours are NaN. Use HourlyArrayStore.build(...) to create one and
+    HourlyArrayStore.open(directory) to load it.
+    """
+
+    def __init__(self, directory, data, meta):
+        self.directory = Path(directory)
+        self.data = data
+        self.meta = meta
+        self.cities = list(meta['cities'])
+        self.pollutants = list(meta['pollutants'])
+        self.start = np.datetime64(meta['start'], 'h')
+        self._city_index = {c.lower(): i for i, c in enumerate(self.cities)}
+        self._pollutant_index = {p: i for i, p in enumerate(self.pollutants)}
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def times(self):
+        """datetime64[h] array labelling the time axis."""
+        return self.start + np.arange(self.data.shape[1])
+
+    @classmethod
+    def open(cls, directory):
+        directory = Path(directory)
+        meta_path = directory / META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Array store not found: {directory}")
+        with open(meta_path, "r") as fh:
+            meta = json.load(fh)
+        data = np.load(directory / DATA_FILE, mmap_mode='r')
+        return cls(directory, data, meta)
+
+    @classmethod
+    def build(cls, city_hourly, directory, pollutants=None):
+        """
+        Lay out a long City/Datetime/pollutant frame (as returned by
+        ingest.stream_city_hourly) on a dense hourly grid and write it to
+        `directory`. Readings off the hour are truncated into their hour;
+        hours with no reading are stored as NaN.
+        """
+        pollutants = [p for p in (POLLUTANTS if pollutants is None else pollutants) if p in city_hourly.columns]
+        frame = city_hourly.dropna(subset=['City', 'Datetime'])
+        if frame.empty:
+            raise ValueError("No City/Datetime rows to store")
+        frame = frame.assign(Datetime=frame['Datetime'].dt.floor('h'))
+
+        cities, dates = grid_axes(frame, start=frame['Datetime'].min())
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        shape = (len(cities), len(dates), len(pollutants))
+        # open_memmap writes a proper .npy header so np.load(..., mmap_mode='r') works
+        data = np.lib.format.open_memmap(directory / DATA_FILE, mode='w+', dtype=np.float32, shape=shape)
+        dense_city_hour_array(frame, pollutants, start=dates[0], end=dates[-1], cities=cities, out=data)
+        data.flush()
+        del data
+
+        meta = {
+            'cities': [str(c) for c in cities],
+            'pollutants': pollutants,
+            'start': str(np.datetime64(dates[0], 'h')),
+            'freq': 'h',
+            'shape': list(shape),
+            'dtype': 'float32'
+        }
+        with open(directory / META_FILE, "w") as fh:
+            json.dump(meta, fh, indent=2)
+        return cls.open(directory)
+
+    @classmethod
+    def build_from_csv(cls, csv_path, directory, stations_path=None, pollutants=None):
+        """Stream a station_hour.csv / data.csv file straight into a store."""
+        city_hourly = stream_city_hourly(csv_path, stations_path=stations_path, pollutants=pollutants)
+        return cls.build(city_hourly, directory, pollutants=pollutants)
+
+    def city_index(self, city: str) -> int:
+        try:
+            return self._city_index[str(city).strip().lower()]
+        except KeyError:
+            raise KeyError(f"Unknown city: {city}") from None
+
+    def pollutant_index(self, pollutant: str) -> int:
+        try:
+            return self._pollutant_index[pollutant]
+        except KeyError:
+            raise KeyError(f"Unknown pollutant: {pollutant}") from None
+
+    def city(self, city: str):
+        """(n_hours, n_pollutants) view of one city's full history (no copy)."""
+        return self.data[self.city_index(city)]
+
+    def pollutant(self, pollutant: str):
+        """(n_cities, n_hours) view of one pollutant across all cities (no copy)."""
+        return self.data[:, :, self.pollutant_index(pollutant)]
+
+    def city_frame(self, city: str):
+        """One city's history as a Datetime-indexed DataFrame."""
+        return pd.DataFrame(
+            np.asarray(self.city(city)),
+            index=pd.DatetimeIndex(self.times, name='Datetime'),
+            columns=self.pollutants
+        )
@@ -0,0 +1,78 @@
+# app/Backend_core/correlation.py
+"""
+Pairwise-complete Pearson correlation for many groups (cities) at once.
+
+For every group and pair of columns (i, j) only rows where both are present
+count, as in DataFrame.corr(). Each group reduces to a few P x P moment
+matrices (pair counts, sums, squared sums and cross-products over the
+validity masks) computed with matrix products, so a whole frame costs one
+pass and the result is a (n_groups, P, P) array. Moments add up, so groups
+can also be pooled before converting to correlations.
+"""
+import numpy as np
+
+MOMENTS = ('n', 'sx', 'sxx', 'sxy')
+
+
+def group_starts(keys):
+    """(starts, ends) row ranges of the contiguous runs of equal keys."""
+    keys = np.asarray(keys)
+    is_start = np.ones(len(keys), dtype=bool)
+    is_start[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(is_start)
+    return starts, np.append(starts[1:], len(keys))
+
+
+def correlation_moments(values, starts, ends):
+    """
+    Moment matrices of every row range [starts[g], ends[g]) of `values`
+    (n_rows, P; NaN = missing). Returns {'n', 'sx', 'sxx', 'sxy'}, each of
+    shape (n_groups, P, P), where for group g and pair (i, j) over the rows
+    with both i and j present: n = count, sx = sum of x_i, sxx = sum of x_i**2
+    and sxy = sum of x_i * x_j.
+    """
+    values = np.asarray(values)
+    n_groups, p = len(starts), values.shape[1]
+    out = {k: np.zeros((n_groups, p, p), dtype=np.float64) for k in MOMENTS}
+    for g, (s, e) in enumerate(zip(starts, ends)):
+        block = values[s:e].astype(np.float64)
+        valid = ~np.isnan(block)
+        mask = valid.astype(np.float64)
+        # shift by the column means: correlation is unchanged and the sums stay small
+        x = np.where(valid, block, 0.0)
+        shift = x.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+        x = np.where(valid, x - shift, 0.0)
+        out['n'][g] = mask.T @ mask
+        out['sx'][g] = x.T @ mask
+        out['sxx'][g] = (x * x).T @ mask
+        out['sxy'][g] = x.T @ x
+    return out
+
+
+def pearson(moments, min_periods: int = 2):
+    """Correlation matrices from correlation_moments (or pooled sums of them); NaN where undefined."""
+    n, sx, sxx, sxy = (moments[k] for k in MOMENTS)
+    sy, syy = np.swapaxes(sx, -1, -2), np.swapaxes(sxx, -1, -2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        r = cov / np.sqrt(var_x * var_y)
+    r[(n < max(2, min_periods)) | ~(var_x > 0) | ~(var_y > 0)] = np.nan
+    return np.clip(r, -1.0, 1.0).astype(np.float32)
+
+
+def pooled(moments, groups=None):
+    """Moments of several groups (indices; None = all) merged into one group."""
+    sel = slice(None) if groups is None else list(groups)
+    return {k: moments[k][sel].sum(axis=0, keepdims=True) for k in MOMENTS}
+
+
+def grouped_correlation(values, keys, min_periods: int = 2):
+    """
+    (corr, group_keys): (n_groups, P, P) pairwise-complete Pearson matrices of
+    `values` per contiguous run of `keys` (rows sorted by group).
+    """
+    starts, ends = group_starts(keys)
+    corr = pearson(correlation_moments(values, starts, ends), min_periods)
+    return corr, [np.asarray(keys)[s] for s in starts]
@@ -0,0 +1,99 @@
+# app/Backend_core/downsample.py
+"""
+Shape-preserving downsampling of long series for charts, in O(n).
+
+'lttb' (Largest-Triangle-Three-Buckets) keeps, per bucket, the point that
+forms the largest triangle with the previously kept point and the next
+bucket's average, so peaks and dips survive; 'minmax' keeps each bucket's
+minimum and maximum. Both return real data points (nothing is averaged).
+
+For 2-D y every column is reduced on its own; the result rows are the union
+of the kept points and a column is NaN on rows it did not keep, which chart
+code that skips NaNs draws as each series' own reduced line.
+"""
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out: int):
+    """Indices of the n_out points LTTB keeps from (x, y) (no NaNs, x increasing)."""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n) if n <= n_out else np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+    # first and last point are always kept; n_out - 2 buckets in between
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 1 < n_out - 2:
+            cx, cy = avg_x[b + 1], avg_y[b + 1]
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[b + 1] = a
+    return out
+
+
+def minmax_indices(y, n_out: int):
+    """Indices of the minimum and maximum of n_out // 2 equal-count buckets of y (no NaNs), sorted."""
+    n = len(y)
+    n_buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    starts = np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+    bucket = np.repeat(np.arange(n_buckets), np.diff(np.append(starts, n)))
+    rows = np.arange(n)
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    first_low = np.minimum.reduceat(np.where(y == lows[bucket], rows, n), starts)
+    first_high = np.minimum.reduceat(np.where(y == highs[bucket], rows, n), starts)
+    return np.unique(np.concatenate([first_low, first_high]))
+
+
+def downsample(x, y, max_points: int, method: str = 'lttb'):
+    """
+    Reduce (x, y) to at most max_points points per series. y is 1-D or 2-D
+    (rows aligned with x); NaNs are never selected. Returns (x_out, y_out).
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if max_points is None or len(x) <= max_points:
+        return x, y
+
+    x_num = _numeric(x)
+    columns = y[:, None] if y.ndim == 1 else y
+    kept = []
+    for j in range(columns.shape[1]):
+        valid = np.flatnonzero(~np.isnan(columns[:, j]))
+        v = columns[valid, j].astype(np.float64)
+        if method == 'lttb':
+            sel = lttb_indices(x_num[valid], v, max_points)
+        else:
+            sel = minmax_indices(v, max_points)
+        kept.append(valid[sel])
+
+    if y.ndim == 1:
+        return x[kept[0]], y[kept[0]]
+    rows = np.unique(np.concatenate(kept)) if kept else np.empty(0, dtype=np.int64)
+    out = np.full((len(rows), columns.shape[1]), np.nan, dtype=y.dtype if y.dtype.kind == 'f' else np.float64)
+    for j, k in enumerate(kept):
+        pos = np.searchsorted(rows, k)
+        out[pos, j] = columns[k, j]
+    return x[rows], out
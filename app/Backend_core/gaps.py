@@ -0,0 +1,92 @@
+# app/Backend_core/gaps.py
+"""
+Bounded gap filling for the hourly city data.
+
+Works on a long frame sorted by City then Datetime and handles every city
+and pollutant in a handful of vectorized passes (no per-city groupby). A
+gap - the run of hours between two valid readings, counting hours whose
+rows are missing entirely - is filled only if it is at most `max_gap_hours`
+long, so values are never carried across days or weeks of downtime.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_GAP_HOURS = 6
+METHODS = ('ffill', 'interpolate')
+
+
+def _group_bounds(keys):
+    """Per-row index of the first and last row of its (contiguous) group."""
+    n = len(keys)
+    rows = np.arange(n)
+    codes = pd.factorize(keys)[0]
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = codes[1:] != codes[:-1]
+    is_end = np.ones(n, dtype=bool)
+    is_end[:-1] = is_start[1:]
+    first = np.maximum.accumulate(np.where(is_start, rows, 0))
+    last = np.minimum.accumulate(np.where(is_end, rows, n - 1)[::-1])[::-1]
+    return first, last
+
+
+def fill_gaps(frame, columns, max_gap_hours: float = DEFAULT_MAX_GAP_HOURS, method: str = 'ffill',
+              group: str = 'City', time: str = 'Datetime', dtype=np.float32):
+    """
+    Fill short gaps in `columns` of `frame` (sorted by group, then time).
+    method='ffill' repeats the last reading, 'interpolate' draws a straight
+    line in time between the readings either side (gaps at the end of a
+    city's history fall back to ffill).
+    Returns (values, imputed): the filled (n_rows, n_columns) array and a
+    boolean array of the same shape marking the values that were imputed.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    n = len(frame)
+    values = frame[list(columns)].to_numpy(dtype=dtype, na_value=np.nan, copy=True)
+    imputed = np.zeros(values.shape, dtype=bool)
+    if n == 0:
+        return values, imputed
+
+    rows = np.arange(n)
+    first, last = _group_bounds(frame[group].to_numpy())
+    stamps = frame[time].to_numpy(dtype='datetime64[ns]')
+    has_time = ~np.isnat(stamps)
+    hours = stamps.astype(np.int64) / 3.6e12
+
+    for j in range(values.shape[1]):
+        v = values[:, j]
+        valid = ~np.isnan(v) & has_time
+        prev = np.maximum.accumulate(np.where(valid, rows, -1))
+        nxt = np.minimum.accumulate(np.where(valid, rows, n)[::-1])[::-1]
+        has_prev = prev >= first
+        has_next = nxt <= last
+        prev_c = np.clip(prev, 0, n - 1)
+        nxt_c = np.clip(nxt, 0, n - 1)
+
+        # length of the whole gap in hours (readings are one hour apart when there is no gap)
+        gap_end = np.where(has_next, hours[nxt_c], hours[last] + 1.0)
+        gap_hours = gap_end - hours[prev_c] - 1.0
+        fill = ~valid & has_time & has_prev & (gap_hours <= max_gap_hours)
+
+        filled = v[prev_c]
+        if method == 'interpolate':
+            between = fill & has_next
+            span = hours[nxt_c] - hours[prev_c]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                w = np.where(between, (hours - hours[prev_c]) / span, 0.0)
+            filled = np.where(between, v[prev_c] + w * (v[nxt_c] - v[prev_c]), filled)
+
+        v[fill] = filled[fill]
+        imputed[:, j] = fill
+    return values, imputed
+
+
+def pack_mask(mask):
+    """Bit-pack a boolean mask for storage; returns (packed uint8, shape)."""
+    return np.packbits(mask, axis=None), mask.shape
+
+
+def unpack_mask(packed, shape):
+    """Inverse of pack_mask."""
+    count = int(np.prod(shape))
+    return np.unpackbits(packed, count=count).astype(bool).reshape(shape)
@@ -0,0 +1,72 @@
+# app/Backend_core/grid.py
+"""
+Completion of city-hour data onto a full hourly grid.
+
+Both helpers take a long frame with one row per (City, Datetime) - e.g. the
+output of ingest.stream_city_hourly - and return it on the complete
+cities x hours grid with missing slots as NaN, together with the number of
+slots that had to be filled.
+"""
+import numpy as np
+import pandas as pd
+
+
+def grid_axes(city_hourly, start=None, end=None, freq='h', cities=None):
+    """(cities, dates) of the grid; defaults span every city and the full time range."""
+    if cities is None:
+        cities = pd.Index(city_hourly['City'].dropna().unique()).sort_values()
+    else:
+        cities = pd.Index(cities)
+    if start is None:
+        start = city_hourly['Datetime'].min()
+    if end is None:
+        end = city_hourly['Datetime'].max()
+    dates = pd.date_range(start=start, end=end, freq=freq, name='Datetime')
+    return cities, dates
+
+
+def complete_city_hour_grid(city_hourly, start=None, end=None, freq='h', cities=None):
+    """
+    Reindex `city_hourly` on the MultiIndex product of cities and the hourly
+    range [start, end]. Rows outside the range are dropped.
+    Returns (complete_df, n_filled) where complete_df has City, Datetime and
+    the value columns, and n_filled is the number of slots added as NaN.
+    """
+    cities, dates = grid_axes(city_hourly, start, end, freq, cities)
+    full_index = pd.MultiIndex.from_product([cities.rename('City'), dates], names=['City', 'Datetime'])
+
+    indexed = city_hourly.set_index(['City', 'Datetime'])
+    if not indexed.index.is_unique:
+        raise ValueError("city_hourly must have one row per (City, Datetime)")
+
+    present = int(indexed.index.isin(full_index).sum())
+    complete = indexed.reindex(full_index).reset_index()
+    return complete, len(full_index) - present
+
+
+def dense_city_hour_array(city_hourly, columns, start=None, end=None, freq='h', cities=None,
+                          dtype=np.float32, out=None):
+    """
+    Scatter `columns` of `city_hourly` into a (n_cities, n_hours, n_columns)
+    array without building the long grid. `out` may be a preallocated array
+    (e.g. a np.memmap) of that shape; otherwise one is allocated.
+    Returns (array, cities, dates, n_filled).
+    """
+    cities, dates = grid_axes(city_hourly, start, end, freq, cities)
+    shape = (len(cities), len(dates), len(columns))
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, expected {shape}")
+    out[:] = np.nan
+
+    city_codes = cities.get_indexer(city_hourly['City'])
+    hour_codes = dates.get_indexer(city_hourly['Datetime'])
+    keep = (city_codes >= 0) & (hour_codes >= 0)
+    values = city_hourly[columns].to_numpy(dtype=dtype, na_value=np.nan)[keep]
+    out[city_codes[keep], hour_codes[keep], :] = values
+
+    # count distinct occupied slots so duplicates are not counted twice
+    occupied = np.zeros(shape[:2], dtype=bool)
+    occupied[city_codes[keep], hour_codes[keep]] = True
+    return out, cities, dates, int(occupied.size - occupied.sum())
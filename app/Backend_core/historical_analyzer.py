@@ -1,12 +1,74 @@
 # app/Backend_core/historical_analyzer.py
+import json
+import os
+import pickle
+import tempfile
+import zipfile
 from pathlib import Path
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from .correlation import correlation_moments, pearson, pooled
+from .downsample import downsample
+from .gaps import DEFAULT_MAX_GAP_HOURS, fill_gaps, pack_mask, unpack_mask
+from .ingest import POLLUTANTS, read_pruned
+from .range_query import TimeRangeIndex
+from .rankings import CityLeaderboard
+from .similarity import DEFAULT_COMPONENTS, CitySimilarityIndex
+from .sketches import DEFAULT_QUANTILES, QuantileSketchGrid, build_city_month_sketches
+
+_plot_modules = None
+
+# keys shared by generate_city_series and generate_city_analysis results
+SUMMARY_KEYS = ['peak_months', 'best_month', 'worst_month', 'most_toxic_overall', 'avg_pollutants']
+PLOT_KEYS = ['yearly_path', 'monthly_path', 'hourly_path', 'most_toxic_path', 'heatmap_path']
+SERIES_KEYS = ['yearly', 'monthly', 'hourly', 'timeline']
+
+# what a missing, truncated or foreign cache file can raise on load: all cache misses
+CACHE_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile, pickle.UnpicklingError)
+
+
+def _write_atomic(path, write):
+    """
+    Call write(tmp) on a fresh temp file next to `path`, then rename it over
+    `path`. Readers never see a partial file, and concurrent writers (the
+    precompute workers) never share a temp file. The temp name keeps
+    path's suffix, so np.savez does not append another one.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=path.suffix)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _dump_json(obj, path, **kwargs):
+    with open(path, "w") as fh:
+        json.dump(obj, fh, **kwargs)
+
+
+def _plotting():
+    """
+    Import matplotlib (Agg backend) and seaborn on first use and return
+    (plt, sns). The plot-free paths never pay for the plotting stack.
+    """
+    global _plot_modules
+    if _plot_modules is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        # make plots look consistent
+        sns.set(style="whitegrid")
+        _plot_modules = (plt, sns)
+    return _plot_modules
 
-# make plots look consistent
-sns.set(style="whitegrid")
 
 class HistoricalAnalyzer:
     """
@@ -15,10 +77,15 @@ class HistoricalAnalyzer:
     Constructor signature matches your existing code: HistoricalAnalyzer(csv_filepath, plots_dir=None)
     """
 
-    def __init__(self, csv_filepath, plots_dir: str = None):
+    def __init__(self, csv_filepath, plots_dir: str = None, cache_dir: str = None,
+                 max_gap_hours: float = DEFAULT_MAX_GAP_HOURS, gap_method: str = 'ffill',
+                 downsample_method: str = 'lttb'):
         """
         csv_filepath: path to data.csv relative to app/ (e.g. "data_analysis/Data/data.csv")
         plots_dir: directory to save generated plots (relative to app/). Default: "assets/plots"
+        cache_dir: directory of precomputed results (see Backend_core.precompute). Default: no cache
+        max_gap_hours / gap_method: gaps up to this many hours are filled ('ffill' or 'interpolate')
+        downsample_method: how the full-history timeline is reduced ('lttb' or 'minmax')
         """
         self.csv_filepath = Path(csv_filepath)
         if plots_dir is None:
@@ -26,13 +93,21 @@ class HistoricalAnalyzer:
         else:
             self.plots_dir = Path(plots_dir)
         self.plots_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_gap_hours = max_gap_hours
+        self.gap_method = gap_method
+        self.downsample_method = downsample_method
         self._df = None
+        self._clean = None
+        self._imputed = None
+        self._range_index = None
+        self._sketches = None
+        self._moments = None
+        self._leaderboard = None
+        self._similarity = None
 
         # pollutants list (same as analysis.py)
-        self.pollutants = [
-            'PM2.5', 'PM10', 'NO', 'NO2', 'NOx', 'NH3', 'CO', 'SO2',
-            'O3', 'Benzene', 'Toluene', 'Xylene'
-        ]
+        self.pollutants = list(POLLUTANTS)
 
     def load_df(self):
         if self._df is not None:
@@ -41,28 +116,278 @@ class HistoricalAnalyzer:
         if not self.csv_filepath.exists():
             raise FileNotFoundError(f"CSV not found: {self.csv_filepath}")
 
-        # load with low_memory=False to avoid DtypeWarning
-        df = pd.read_csv(self.csv_filepath, low_memory=False)
+        # only City/Datetime and the pollutants are used: read just those
+        # columns, pollutants straight to float32, in chunks
+        df = read_pruned(self.csv_filepath, pollutants=self.pollutants)
 
-        # ensure Datetime column
-        if 'Datetime' not in df.columns and 'Date' in df.columns:
-            df['Datetime'] = pd.to_datetime(df['Date'], errors='coerce')
-            if 'Hour' in df.columns:
-                df['Datetime'] += pd.to_timedelta(df['Hour'], unit='h')
-        else:
-            df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
+        self._df = df
+        return self._df
 
-        # normalize City column name
-        if 'City' not in df.columns and 'city' in df.columns:
-            df['City'] = df['city']
+    def clean_df(self):
+        """
+        All rows sorted by City then Datetime, with gaps of at most
+        max_gap_hours filled for every city and pollutant in one pass.
+        Computed once per analyzer and, with cache_dir, once per CSV.
+        """
+        if self._clean is not None:
+            return self._clean
 
-        # ensure numeric pollutant columns exist (coerce to numeric)
-        for p in self.pollutants:
-            if p in df.columns:
-                df[p] = pd.to_numeric(df[p], errors='coerce')
+        cached = self._load_clean_cache()
+        if cached is not None:
+            self._clean, self._imputed = cached
+            return self._clean
 
-        self._df = df
-        return self._df
+        df = self.load_df()
+        df = df.dropna(subset=['City']).sort_values(['City', 'Datetime'], kind='mergesort').reset_index(drop=True)
+        cols = [p for p in self.pollutants if p in df.columns]
+        values, imputed = fill_gaps(df, cols, max_gap_hours=self.max_gap_hours, method=self.gap_method)
+        df[cols] = values
+
+        self._clean, self._imputed = df, imputed
+        self._save_clean_cache(df, imputed)
+        return self._clean
+
+    def imputed_mask(self):
+        """Boolean DataFrame (rows of clean_df, pollutant columns) marking filled values."""
+        df = self.clean_df()
+        cols = [p for p in self.pollutants if p in df.columns]
+        return pd.DataFrame(self._imputed, index=df.index, columns=cols)
+
+    def range_index(self):
+        """TimeRangeIndex over clean_df, built once."""
+        if self._range_index is None:
+            df = self.clean_df()
+            self._range_index = TimeRangeIndex(df, [p for p in self.pollutants if p in df.columns])
+        return self._range_index
+
+    def query_range(self, city: str, start=None, end=None, pollutants=None, raw: bool = False):
+        """
+        Statistics (or raw hourly values) for one city over a time window, e.g.
+        query_range('Delhi', '2019-11', '2020-01', ['PM2.5', 'NO2']).
+        String bounds cover the whole period they name; None means open-ended.
+        Returns {pollutant: {'mean','min','max','count'}}, or with raw=True
+        {'times': datetime64 array, 'values': (n, k) array, 'pollutants': [...]}.
+        Raises KeyError for an unknown city or pollutant.
+        """
+        index = self.range_index()
+        if raw:
+            times, values, names = index.series(city, start, end, pollutants)
+            return {'times': times, 'values': values, 'pollutants': names}
+        return index.aggregate(city, start, end, pollutants)
+
+    def correlation_moments(self):
+        """
+        (moments, cities): pairwise-complete correlation moments of every
+        city (see Backend_core.correlation), over the measured values only -
+        gap-filled hours are left out. Computed in one pass over clean_df and,
+        with cache_dir, stored as correlation.npz.
+        """
+        if self._moments is not None:
+            return self._moments
+        key = json.dumps(self._clean_cache_key())
+        path = self.cache_dir / "correlation.npz" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            try:
+                with np.load(path) as npz:
+                    if str(npz['key']) == key:
+                        self._moments = ({k: npz[k] for k in ('n', 'sx', 'sxx', 'sxy')}, list(npz['cities']))
+                        return self._moments
+            except CACHE_ERRORS:
+                pass
+
+        index = self.range_index()
+        self.clean_df()
+        values = np.where(self._imputed, np.nan, index.values)
+        starts = np.asarray([index.lookup(name)[0] for name in index.names], dtype=np.int64)
+        ends = np.append(starts[1:], len(values))
+        moments = correlation_moments(values, starts, ends)
+        if path is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cities = np.asarray(index.names)
+            _write_atomic(path, lambda tmp: np.savez(tmp, key=np.asarray(key), cities=cities, **moments))
+        self._moments = (moments, list(index.names))
+        return self._moments
+
+    def correlations(self):
+        """(matrices, cities, pollutants): a (n_cities, P, P) float32 array of Pearson correlations."""
+        moments, cities = self.correlation_moments()
+        return pearson(moments), cities, list(self.range_index().columns)
+
+    def correlation(self, city):
+        """
+        Pollutant x pollutant correlation DataFrame for one city, or for
+        several cities pooled together when `city` is a list.
+        Raises KeyError for an unknown city.
+        """
+        moments, _ = self.correlation_moments()
+        index = self.range_index()
+        wanted = [city] if isinstance(city, str) else list(city)
+        rows = [index.position(c) for c in wanted]
+        if None in rows:
+            raise KeyError(f"Unknown city: {wanted[rows.index(None)]}")
+        cols = index.columns
+        return pd.DataFrame(pearson(pooled(moments, rows))[0], index=cols, columns=cols)
+
+    def leaderboard(self):
+        """
+        CityLeaderboard (see Backend_core.rankings) over clean_df: per city,
+        year and month pollutant totals for ranking all cities at once.
+        Built once and, with cache_dir, stored as leaderboard.npz.
+        """
+        if self._leaderboard is not None:
+            return self._leaderboard
+        key = self._clean_cache_key()
+        path = self.cache_dir / "leaderboard.npz" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            try:
+                board, meta = CityLeaderboard.load(path)
+                if meta.get('key') == key:
+                    self._leaderboard = board
+                    return board
+            except CACHE_ERRORS:
+                pass
+
+        board = CityLeaderboard.from_frame(self.clean_df(), self.pollutants)
+        if path is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, lambda tmp: board.save(tmp, key=key))
+        self._leaderboard = board
+        return board
+
+    def similarity_index(self, n_components: int = DEFAULT_COMPONENTS):
+        """
+        CitySimilarityIndex (see Backend_core.similarity) of every city's
+        monthly and hourly pollutant profile in clean_df. Built once and,
+        with cache_dir, stored as similarity.npz.
+        """
+        if self._similarity is not None and self._similarity[0] == n_components:
+            return self._similarity[1]
+        key = dict(self._clean_cache_key(), n_components=n_components)
+        path = self.cache_dir / "similarity.npz" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            try:
+                index, meta = CitySimilarityIndex.load(path)
+                if meta.get('key') == key:
+                    self._similarity = (n_components, index)
+                    return index
+            except CACHE_ERRORS:
+                pass
+
+        index = CitySimilarityIndex.from_frame(self.clean_df(), self.pollutants, n_components=n_components)
+        if path is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, lambda tmp: index.save(tmp, key=key))
+        self._similarity = (n_components, index)
+        return index
+
+    def similar_cities(self, city: str, k: int = 5):
+        """
+        The k cities whose monthly and hourly pollution profiles are closest
+        to `city`'s: [{'city', 'distance'}, ...], closest first.
+        Raises KeyError for an unknown city.
+        """
+        return self.similarity_index().neighbours(city, k)
+
+    def quantile_sketches(self):
+        """
+        (grid, cities): city x month x pollutant QuantileSketchGrid of the
+        measured (not gap-filled) values, built in one streaming pass over
+        the CSV and, with cache_dir, stored as sketches.npz next to the other
+        precomputed results.
+        """
+        if self._sketches is not None:
+            return self._sketches
+        key = {'source': self._source_stamp(), 'pollutants': self.pollutants}
+        path = self.cache_dir / "sketches.npz" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            try:
+                grid, labels = QuantileSketchGrid.load(path)
+                if labels.get('key') == key:
+                    self._sketches = (grid, labels['cities'])
+                    return self._sketches
+            except CACHE_ERRORS:
+                pass
+
+        grid, cities = build_city_month_sketches(self.csv_filepath, pollutants=self.pollutants)
+        if path is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, lambda tmp: grid.save(tmp, key=key, cities=cities))
+        self._sketches = (grid, cities)
+        return self._sketches
+
+    def percentiles(self, city=None, pollutants=None, months=None, qs=DEFAULT_QUANTILES):
+        """
+        Approximate percentiles (1% relative error) from the quantile sketches.
+        city / months may be a single value, a list (merged together) or None
+        for all of them, e.g. percentiles(['Delhi', 'Noida'], months=[11, 12, 1]).
+        Returns {pollutant: {'p50': .., 'p90': .., 'p99': .., 'count': ..}}
+        (None for pollutants without readings). Raises KeyError for an unknown city.
+        """
+        grid, cities = self.quantile_sketches()
+        counts = grid.counts
+        if city is not None:
+            lookup = {c.lower(): i for i, c in enumerate(cities)}
+            wanted = [city] if isinstance(city, str) else list(city)
+            try:
+                rows = [lookup[str(c).strip().lower()] for c in wanted]
+            except KeyError as ex:
+                raise KeyError(f"Unknown city: {ex.args[0]}") from None
+            counts = counts[rows]
+        if months is not None:
+            months = [months] if np.isscalar(months) else list(months)
+            counts = counts[:, [int(m) - 1 for m in months]]
+        pollutants = self.pollutants if pollutants is None else list(pollutants)
+        cols = []
+        for p in pollutants:
+            if p not in self.pollutants:
+                raise KeyError(f"Unknown pollutant: {p}")
+            cols.append(self.pollutants.index(p))
+        merged = grid.with_counts(counts[:, :, cols]).combine(axis=(0, 1))
+        values, n = merged.quantiles(qs), merged.count()
+
+        out = {}
+        for j, p in enumerate(pollutants):
+            if not n[j]:
+                out[p] = None
+                continue
+            out[p] = {f"p{q * 100:g}": round(float(values[j, k]), 3) for k, q in enumerate(qs)}
+            out[p]['count'] = int(n[j])
+        return out
+
+    def _clean_cache_key(self):
+        return {
+            'source': self._source_stamp(),
+            'max_gap_hours': self.max_gap_hours,
+            'gap_method': self.gap_method,
+            'pollutants': self.pollutants
+        }
+
+    def _load_clean_cache(self):
+        if self.cache_dir is None:
+            return None
+        meta_path = self.cache_dir / "cleaned.json"
+        try:
+            with open(meta_path, "r") as fh:
+                if json.load(fh) != self._clean_cache_key():
+                    return None
+            df = pd.read_pickle(self.cache_dir / "cleaned.pkl")
+            with np.load(self.cache_dir / "cleaned_imputed.npz") as npz:
+                imputed = unpack_mask(npz['bits'], tuple(npz['shape']))
+        except CACHE_ERRORS:
+            return None
+        return df, imputed
+
+    def _save_clean_cache(self, df, imputed):
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        bits, shape = pack_mask(imputed)
+        key = self._clean_cache_key()
+        _write_atomic(self.cache_dir / "cleaned.pkl", df.to_pickle)
+        _write_atomic(self.cache_dir / "cleaned_imputed.npz",
+                      lambda tmp: np.savez(tmp, bits=bits, shape=np.asarray(shape)))
+        # metadata last: it is what marks the cache as complete
+        _write_atomic(self.cache_dir / "cleaned.json", lambda tmp: _dump_json(key, tmp))
 
     def _save_fig(self, fig, filename: str) -> str:
         """
@@ -71,12 +396,243 @@ class HistoricalAnalyzer:
         """
         out_path = self.plots_dir / filename
         fig.savefig(out_path, dpi=180, bbox_inches='tight')
-        plt.close(fig)
+        _plotting()[0].close(fig)
         # return path relative to assets folder so Flet can load using assets_dir="assets"
         rel = Path("plots") / filename
         return str(rel)
 
-    def generate_city_analysis(self, city: str):
+    def _city_frame(self, city: str):
+        """
+        Return the rows for `city` sorted by time with short gaps filled, with
+        Year/Month/Hour columns attached. Returns None if the city is unknown.
+        """
+        df = self.clean_df()
+
+        # city rows are contiguous in clean_df (case-insensitive, contains fallback)
+        rows = self.range_index().lookup(city)
+        if rows is None or rows[0] == rows[1]:
+            return None
+        city_df = df.iloc[rows[0]:rows[1]].copy()
+
+        # gaps were already filled for every city in clean_df()
+
+        if 'Year' not in city_df.columns:
+            city_df['Year'] = city_df['Datetime'].dt.year
+        if 'Month' not in city_df.columns:
+            city_df['Month'] = city_df['Datetime'].dt.month
+        if 'Hour' not in city_df.columns:
+            city_df['Hour'] = city_df['Datetime'].dt.hour
+        return city_df
+
+    def _summarize(self, city_df, monthly, avg_pollutants):
+        """Best/worst month, peak month per pollutant and most toxic pollutant."""
+        # best & worst month (by average of pollutants)
+        with np.errstate(all='ignore'):
+            monthly_mean = monthly.mean(axis=1)
+            best_month = int(monthly_mean.idxmin()) if not monthly_mean.empty else None
+            worst_month = int(monthly_mean.idxmax()) if not monthly_mean.empty else None
+
+        # Peak month for each pollutant
+        peak_months = {}
+        for p in self.pollutants:
+            if p in monthly.columns:
+                try:
+                    peak_months[p] = int(monthly[p].idxmax())
+                except Exception:
+                    peak_months[p] = None
+
+        most_toxic_overall = avg_pollutants.index[0] if not avg_pollutants.empty else None
+        return {
+            'peak_months': peak_months,
+            'best_month': best_month,
+            'worst_month': worst_month,
+            'most_toxic_overall': str(most_toxic_overall) if most_toxic_overall is not None else None,
+            'avg_pollutants': avg_pollutants.fillna(0).to_dict()
+        }
+
+    @staticmethod
+    def _series(frame):
+        """Pack a pollutant-by-column frame as {'index': ndarray, 'values': float32 ndarray}."""
+        return {
+            'index': frame.index.to_numpy(),
+            'values': frame.to_numpy(dtype=np.float32, na_value=np.nan)
+        }
+
+    def _cache_paths(self, city: str):
+        key = str(city).strip().lower().replace(" ", "_").replace("/", "_")
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.npz"
+
+    def _source_stamp(self):
+        """Size and mtime of the CSV; cached results are only valid for the same file."""
+        st = self.csv_filepath.stat()
+        return [st.st_size, st.st_mtime_ns]
+
+    def _gap_params(self):
+        """The gap filling every cached result was computed with (see clean_df)."""
+        return {'max_gap_hours': self.max_gap_hours, 'gap_method': self.gap_method}
+
+    def _read_cache_meta(self, json_path):
+        """The JSON of a cache entry if it was built from the current CSV with the same gap filling, else None."""
+        try:
+            with open(json_path, "r") as fh:
+                meta = json.load(fh)
+        except CACHE_ERRORS:
+            return None
+        if meta.get('source') != self._source_stamp() or meta.get('gaps') != self._gap_params():
+            return None
+        return meta
+
+    def save_cached(self, city: str, series=None, analysis=None, max_points: int = None):
+        """
+        Store a generate_city_series and/or generate_city_analysis result in
+        cache_dir. The part not given is kept from the existing entry when
+        that one is still valid (same CSV and gap filling). The JSON file is
+        written last (atomically) and marks the entry as complete, so an
+        interrupted write is simply a cache miss.
+        """
+        if self.cache_dir is None:
+            raise ValueError("HistoricalAnalyzer has no cache_dir")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        json_path, npz_path = self._cache_paths(city)
+        source = series if series is not None else analysis
+
+        previous = self._read_cache_meta(json_path) or {}
+        meta = {
+            'city': source['city'],
+            'source': self._source_stamp(),
+            'gaps': self._gap_params(),
+            'summary': {k: source.get(k) for k in SUMMARY_KEYS},
+            'series': previous.get('series'),
+            'plots': previous.get('plots')
+        }
+        if series is not None:
+            arrays = {}
+            for key in SERIES_KEYS:
+                arrays[f"{key}_index"] = series[key]['index']
+                arrays[f"{key}_values"] = series[key]['values']
+            corr = series.get('correlation')
+            if corr is not None:
+                arrays['correlation_matrix'] = corr['matrix']
+            _write_atomic(npz_path, lambda tmp: np.savez(tmp, **arrays))
+            meta['series'] = {
+                'max_points': max_points,
+                'downsample': self.downsample_method,
+                'pollutants': series['pollutants'],
+                'correlation_labels': corr['labels'] if corr is not None else None
+            }
+        if analysis is not None:
+            meta['plots'] = {k: analysis.get(k) for k in PLOT_KEYS}
+
+        _write_atomic(json_path, lambda tmp: _dump_json(meta, tmp, indent=2, default=float))
+        return json_path
+
+    def load_cached(self, city: str, kind: str = 'series', max_points: int = None):
+        """
+        Return a cached result for `city` or None. kind is 'series' (the
+        generate_city_series dict) or 'analysis' (generate_city_analysis dict,
+        only if every plot file is still on disk).
+        """
+        if self.cache_dir is None:
+            return None
+        json_path, npz_path = self._cache_paths(city)
+        if not json_path.exists():
+            return None
+        meta = self._read_cache_meta(json_path)
+        if meta is None:
+            return None
+
+        summary = meta['summary']
+        summary['peak_months'] = summary.get('peak_months') or {}
+        result = {'city': meta['city']}
+
+        if kind == 'analysis':
+            plots = meta.get('plots')
+            if not plots:
+                return None
+            for rel in plots.values():
+                if rel and not (self.plots_dir / Path(rel).name).exists():
+                    return None
+            result.update(plots)
+        else:
+            info = meta.get('series')
+            if not info or not npz_path.exists() or (max_points is not None and info['max_points'] != max_points):
+                return None
+            if info.get('downsample') != self.downsample_method:
+                return None
+            try:
+                with np.load(npz_path) as npz:
+                    for key in SERIES_KEYS:
+                        result[key] = {'index': npz[f"{key}_index"], 'values': npz[f"{key}_values"]}
+                    result['correlation'] = None
+                    if info['correlation_labels'] is not None:
+                        result['correlation'] = {'labels': info['correlation_labels'],
+                                                 'matrix': npz['correlation_matrix']}
+            except CACHE_ERRORS:
+                return None
+            result['pollutants'] = info['pollutants']
+
+        result.update(summary)
+        return result
+
+    def generate_city_series(self, city: str, max_points: int = 500, use_cache: bool = True):
+        """
+        Plot-free variant of generate_city_analysis: returns the aggregated
+        series as compact numpy arrays so the UI can draw them with native
+        chart controls. Nothing is rendered or written to disk.
+        Returns dict:
+            {
+              'city': city,
+              'pollutants': [...],                       # column order of every 'values' array
+              'yearly':  {'index': years,  'values': (n_years, n_pollutants)},
+              'monthly': {'index': months, 'values': (n_months, n_pollutants)},
+              'hourly':  {'index': hours,  'values': (24, n_pollutants)},
+              'timeline': {'index': datetime64 array, 'values': (n_points, n_pollutants)},  # <= max_points per pollutant
+              'correlation': {'labels': [...], 'matrix': (k, k)} or None,
+              ...same summary keys as generate_city_analysis
+            }
+        """
+        city = str(city).strip()
+        if use_cache:
+            cached = self.load_cached(city, 'series', max_points=max_points)
+            if cached is not None:
+                return cached
+
+        city_df = self._city_frame(city)
+        if city_df is None:
+            return None
+
+        cols = [p for p in self.pollutants if p in city_df.columns]
+        yearly = city_df.groupby('Year')[cols].mean()
+        monthly = city_df.groupby('Month')[cols].mean()
+        hourly = city_df.groupby('Hour')[cols].mean()
+        avg_pollutants = city_df[cols].mean().sort_values(ascending=False)
+
+        # full hourly history, reduced to what a chart can usefully show
+        # (each pollutant keeps its own points and is NaN on the rows it did not keep)
+        t_index, t_values = downsample(
+            city_df['Datetime'].to_numpy(),
+            city_df[cols].to_numpy(dtype=np.float32, na_value=np.nan),
+            max_points, self.downsample_method
+        )
+
+        correlation = None
+        if len(cols) >= 2:
+            corr = self.correlation(city).loc[cols, cols]
+            correlation = {'labels': cols, 'matrix': corr.to_numpy(dtype=np.float32, na_value=np.nan)}
+
+        result = {
+            'city': city,
+            'pollutants': cols,
+            'yearly': self._series(yearly),
+            'monthly': self._series(monthly),
+            'hourly': self._series(hourly),
+            'timeline': {'index': t_index, 'values': t_values.astype(np.float32)},
+            'correlation': correlation
+        }
+        result.update(self._summarize(city_df, monthly, avg_pollutants))
+        return result
+
+    def generate_city_analysis(self, city: str, use_cache: bool = True):
         """
         Perform the same analysis as analysis.py for the given city.
         Returns dict:
@@ -94,22 +650,18 @@ class HistoricalAnalyzer:
             }
         """
         city = str(city).strip()
-        df = self.load_df()
-
-        # filter city (case-insensitive contains fallback)
-        city_df = df[df['City'].str.lower() == city.lower()].copy() if 'City' in df.columns else pd.DataFrame()
-        if city_df.empty and 'City' in df.columns:
-            city_df = df[df['City'].str.lower().str.contains(city.lower(), na=False)].copy()
+        if use_cache:
+            cached = self.load_cached(city, 'analysis')
+            if cached is not None:
+                return cached
 
-        if city_df.empty:
+        city_df = self._city_frame(city)
+        if city_df is None:
             return None
 
-        # forward fill for missing values as original script did
-        city_df = city_df.sort_values('Datetime').ffill()
+        plt, sns = _plotting()
 
         # YEARLY trend
-        if 'Year' not in city_df.columns:
-            city_df['Year'] = city_df['Datetime'].dt.year
         yearly = city_df.groupby('Year')[self.pollutants].mean()
 
         fig, ax = plt.subplots(figsize=(12, 6))
@@ -118,9 +670,7 @@ class HistoricalAnalyzer:
         ax.set_ylabel('Average Concentration')
         yearly_path = self._save_fig(fig, f"{city}_yearly.png")
 
-        # MONTHLY trend and best/worst month
-        if 'Month' not in city_df.columns:
-            city_df['Month'] = city_df['Datetime'].dt.month
+        # MONTHLY trend
         monthly = city_df.groupby('Month')[self.pollutants].mean()
 
         fig, ax = plt.subplots(figsize=(12, 6))
@@ -128,15 +678,7 @@ class HistoricalAnalyzer:
         ax.set_title(f'Monthly Average Pollutants in {city.title()}')
         monthly_path = self._save_fig(fig, f"{city}_monthly.png")
 
-        # best & worst month (by average of pollutants)
-        with np.errstate(all='ignore'):
-            monthly_mean = monthly.mean(axis=1)
-            best_month = int(monthly_mean.idxmin()) if not monthly_mean.empty else None
-            worst_month = int(monthly_mean.idxmax()) if not monthly_mean.empty else None
-
         # HOURLY pattern
-        if 'Hour' not in city_df.columns:
-            city_df['Hour'] = city_df['Datetime'].dt.hour
         hourly = city_df.groupby('Hour')[self.pollutants].mean()
 
         fig, ax = plt.subplots(figsize=(12, 6))
@@ -153,22 +695,11 @@ class HistoricalAnalyzer:
         ax.set_title(f'Most Toxic Pollutants in {city.title()} (Average)')
         most_toxic_path = self._save_fig(fig, f"{city}_most_toxic.png")
 
-        most_toxic_overall = avg_pollutants.index[0] if not avg_pollutants.empty else None
-
-        # Peak month for each pollutant
-        peak_months = {}
-        for p in self.pollutants:
-            if p in monthly.columns:
-                try:
-                    peak_months[p] = int(monthly[p].idxmax())
-                except Exception:
-                    peak_months[p] = None
-
         # Correlation heatmap
         corr_cols = [p for p in self.pollutants if p in city_df.columns]
         heatmap_path = None
         if len(corr_cols) >= 2:
-            corr = city_df[corr_cols].corr()
+            corr = self.correlation(city).loc[corr_cols, corr_cols]
             fig, ax = plt.subplots(figsize=(10, 8))
             sns.heatmap(corr, annot=True, cmap='coolwarm', ax=ax, fmt='.2f')
             ax.set_title(f'Correlation between Pollutants in {city.title()}')
@@ -180,11 +711,7 @@ class HistoricalAnalyzer:
             'monthly_path': monthly_path,
             'hourly_path': hourly_path,
             'most_toxic_path': most_toxic_path,
-            'heatmap_path': heatmap_path,
-            'peak_months': peak_months,
-            'best_month': best_month,
-            'worst_month': worst_month,
-            'most_toxic_overall': str(most_toxic_overall) if most_toxic_overall is not None else None,
-            'avg_pollutants': avg_pollutants.fillna(0).to_dict()
+            'heatmap_path': heatmap_path
         }
+        result.update(self._summarize(city_df, monthly, avg_pollutants))
         return result
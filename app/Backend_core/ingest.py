@@ -0,0 +1,331 @@
+# app/Backend_core/ingest.py
+"""
+Streaming CSV ingestion for the large hourly datasets (station_hour.csv, data.csv).
+
+Files are read in chunks with only the needed columns and explicit dtypes,
+and grouped statistics are kept as running sums/counts so memory is bounded
+by the size of the result rather than the size of the file.
+"""
+import io
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+POLLUTANTS = [
+    'PM2.5', 'PM10', 'NO', 'NO2', 'NOx', 'NH3', 'CO', 'SO2',
+    'O3', 'Benzene', 'Toluene', 'Xylene'
+]
+
+# columns that identify a row; everything else we keep is a pollutant
+KEY_COLUMNS = ['StationId', 'City', 'city', 'Datetime', 'Date', 'Hour']
+
+NA_VALUES = ['', 'NA', 'NaN', 'nan', 'None', 'null', '-']
+
+DEFAULT_CHUNKSIZE = 500_000
+
+
+def read_header(path):
+    """Return the column names of a CSV without reading any rows."""
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+class _ByteRange(io.RawIOBase):
+    """Raw reader over bytes [start, end) of an open binary file."""
+
+    def __init__(self, fh, start: int, end: int):
+        self._fh = fh
+        self._end = end
+        fh.seek(start)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self._end - self._fh.tell())
+        if n <= 0:
+            return 0
+        data = self._fh.read(n)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def iter_chunks(path, pollutants=None, chunksize: int = DEFAULT_CHUNKSIZE, dtype=np.float32,
+                start: int = 0, end: int = None):
+    """
+    Yield DataFrame chunks of `path` holding only key columns and pollutants.
+    Pollutants are converted to `dtype` per chunk, with cells that are not
+    numbers (e.g. 'NA*') becoming NaN as in HistoricalAnalyzer.load_df; a
+    'Datetime' column is always present and 'city' is normalised to 'City'.
+    start/end restrict reading to a byte range of the file (start must be at
+    a line boundary after the header), which lets callers process only rows
+    appended since a previous run.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"CSV not found: {path}")
+
+    pollutants = POLLUTANTS if pollutants is None else pollutants
+    header = read_header(path)
+    keys = [c for c in KEY_COLUMNS if c in header]
+    values = [p for p in pollutants if p in header]
+
+    # numeric columns are not given a dtype here: one junk cell would make
+    # read_csv raise, so they are coerced per chunk instead
+    dtypes = {}
+    for c in ('City', 'city', 'Datetime', 'Date'):
+        if c in keys:
+            dtypes[c] = str
+    if 'StationId' in keys:
+        # ~230 distinct ids: parse once per chunk into small integer codes
+        dtypes['StationId'] = 'category'
+    numeric = {p: dtype for p in values}
+    if 'Hour' in keys:
+        numeric['Hour'] = np.float32
+
+    options = dict(usecols=keys + values, dtype=dtypes, na_values=NA_VALUES, chunksize=chunksize)
+    if start == 0 and end is None:
+        with pd.read_csv(path, **options) as reader:
+            for chunk in reader:
+                yield _normalize_chunk(_coerce_numeric(chunk, numeric))
+        return
+
+    if end is None:
+        end = path.stat().st_size
+    with open(path, "rb") as fh:
+        text = io.TextIOWrapper(io.BufferedReader(_ByteRange(fh, start, end)), encoding="utf-8-sig")
+        if start == 0:
+            reader = pd.read_csv(text, **options)
+        else:
+            reader = pd.read_csv(text, header=None, names=header, **options)
+        with reader:
+            for chunk in reader:
+                yield _normalize_chunk(_coerce_numeric(chunk, numeric))
+
+
+def _coerce_numeric(chunk, dtypes):
+    """Cast {column: dtype} in place; columns read as text (junk cells) go through to_numeric first."""
+    for c, dtype in dtypes.items():
+        col = chunk[c]
+        if col.dtype.kind not in 'fiub':
+            col = pd.to_numeric(col, errors='coerce')
+        chunk[c] = col.astype(dtype, copy=False)
+    return chunk
+
+
+def _normalize_chunk(chunk):
+    """Build the Datetime column the same way HistoricalAnalyzer.load_df does."""
+    if 'Datetime' in chunk.columns:
+        chunk['Datetime'] = pd.to_datetime(chunk['Datetime'], errors='coerce')
+    elif 'Date' in chunk.columns:
+        chunk['Datetime'] = pd.to_datetime(chunk['Date'], errors='coerce')
+        if 'Hour' in chunk.columns:
+            chunk['Datetime'] += pd.to_timedelta(chunk['Hour'], unit='h')
+    if 'City' not in chunk.columns and 'city' in chunk.columns:
+        chunk = chunk.rename(columns={'city': 'City'})
+    return chunk
+
+
+def read_pruned(path, pollutants=None, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Load the whole file with column pruning and float32 pollutants."""
+    chunks = list(iter_chunks(path, pollutants=pollutants, chunksize=chunksize))
+    if not chunks:
+        return pd.DataFrame(columns=['City', 'Datetime'])
+    return pd.concat(chunks, ignore_index=True)
+
+
+def station_city_map(stations_path):
+    """Return a StationId -> City Series from stations.csv."""
+    stations = pd.read_csv(stations_path, usecols=['StationId', 'City'], dtype=str, encoding='utf-8-sig')
+    return stations.set_index('StationId')['City']
+
+
+class StationCodes:
+    """
+    StationId -> integer city/state codes, built once from stations.csv.
+
+    attach() adds int16 'city_code' / 'state_code' columns to a chunk by
+    looking up only the chunk's distinct station ids, so the hourly rows never
+    get an object-dtype City column. decode() turns a code key of an
+    aggregate back into categorical City/State names.
+    """
+
+    def __init__(self, station_ids, cities, states):
+        self.station_index = pd.Index(station_ids)
+        city_codes, self.cities = pd.factorize(pd.Series(cities), sort=True)
+        state_codes, self.states = pd.factorize(pd.Series(states), sort=True)
+        # trailing -1 so unknown stations (index -1) map to -1
+        self._city_of_station = np.append(city_codes, -1).astype(np.int16)
+        self._state_of_station = np.append(state_codes, -1).astype(np.int16)
+
+    @classmethod
+    def from_csv(cls, stations_path):
+        stations = pd.read_csv(stations_path, usecols=['StationId', 'City', 'State'], dtype=str,
+                               encoding='utf-8-sig')
+        stations = stations.dropna(subset=['StationId']).drop_duplicates('StationId')
+        return cls(stations['StationId'].str.strip(), stations['City'], stations['State'])
+
+    def station_codes(self, station_ids):
+        """Row-aligned int array of positions in station_index (-1 if unknown)."""
+        ids = station_ids if isinstance(station_ids.dtype, pd.CategoricalDtype) else station_ids.astype('category')
+        lookup = np.append(self.station_index.get_indexer(ids.cat.categories), -1)
+        return lookup[ids.cat.codes.to_numpy()]
+
+    def attach(self, chunk, drop_unknown: bool = True):
+        stations = self.station_codes(chunk['StationId'])
+        chunk = chunk.assign(
+            city_code=self._city_of_station[stations],
+            state_code=self._state_of_station[stations]
+        )
+        if drop_unknown:
+            chunk = chunk[chunk['city_code'] >= 0]
+        return chunk
+
+    def decode(self, frame, key: str = 'city_code'):
+        """Flat frame with the `key` index level replaced by a categorical City/State column."""
+        name, labels = ('City', self.cities) if key == 'city_code' else ('State', self.states)
+        out = frame.reset_index()
+        codes = out.pop(key).to_numpy()
+        out.insert(0, name, pd.Categorical.from_codes(codes, categories=labels))
+        return out
+
+
+class PartialAggregate:
+    """
+    Mergeable per-group sums and non-NaN counts.
+
+    Feed it chunks with update(); merge() combines aggregates built from other
+    chunks or files; mean() gives the grouped mean exactly as a single
+    groupby(...).mean() over the concatenated data would.
+    """
+
+    def __init__(self, keys, columns, collapse_every: int = 8):
+        self.keys = list(keys)
+        self.columns = list(columns)
+        self.collapse_every = collapse_every
+        self._parts = []
+
+    @classmethod
+    def from_totals(cls, keys, columns, totals):
+        """Rebuild an aggregate from a previously saved `totals` frame."""
+        agg = cls(keys, columns)
+        if totals is not None and not totals.empty:
+            agg._parts.append(totals)
+        return agg
+
+    def update(self, chunk):
+        cols = [c for c in self.columns if c in chunk.columns]
+        values = chunk[cols].astype(np.float64)
+        grouped = values.groupby([chunk[k] for k in self.keys], observed=True, sort=False)
+        part = pd.concat({'sum': grouped.sum(), 'count': grouped.count()}, axis=1)
+        self._parts.append(part)
+        if len(self._parts) >= self.collapse_every:
+            self._collapse()
+        return self
+
+    def merge(self, other):
+        self._parts.extend(other._parts)
+        self._collapse()
+        return self
+
+    def _collapse(self):
+        if len(self._parts) > 1:
+            combined = pd.concat(self._parts)
+            self._parts = [combined.groupby(level=list(range(len(self.keys))), sort=False).sum()]
+
+    @property
+    def totals(self):
+        """DataFrame with ('sum', col) and ('count', col) columns, one row per group."""
+        self._collapse()
+        if not self._parts:
+            return pd.DataFrame()
+        return self._parts[0].sort_index()
+
+    def mean(self):
+        t = self.totals
+        if t.empty:
+            return pd.DataFrame(columns=self.columns)
+        counts = t['count']
+        return t['sum'] / counts.where(counts > 0)
+
+    def count(self):
+        t = self.totals
+        return t['count'] if not t.empty else pd.DataFrame(columns=self.columns)
+
+
+def stream_city_hourly(path, stations_path=None, pollutants=None, chunksize: int = DEFAULT_CHUNKSIZE,
+                       level: str = 'City'):
+    """
+    Mean of every pollutant per (City, Datetime), read in chunks.
+    Rows without a City column are joined to stations.csv through integer
+    station/city codes (level='State' aggregates per state instead).
+    This is the streaming form of merging station_hour with stations and
+    grouping by City and Datetime.
+    """
+    pollutants = POLLUTANTS if pollutants is None else pollutants
+    codes = StationCodes.from_csv(stations_path) if stations_path is not None else None
+    key = 'city_code' if level == 'City' else 'state_code'
+
+    agg = None
+    for chunk in iter_chunks(path, pollutants=pollutants, chunksize=chunksize):
+        if agg is None:
+            by_code = 'City' not in chunk.columns or level != 'City'
+            if by_code and codes is None:
+                raise ValueError("stations_path is required when the CSV has no City column")
+            agg = PartialAggregate([key if by_code else 'City', 'Datetime'], pollutants)
+        if by_code:
+            chunk = codes.attach(chunk)
+        agg.update(chunk)
+
+    # no chunks, or only empty ones (a header-only CSV): no groups either
+    means = agg.mean() if agg is not None else None
+    if means is None or means.empty:
+        return pd.DataFrame(columns=[level, 'Datetime'] + list(pollutants))
+    if by_code:
+        return codes.decode(means, key)
+    return means.reset_index()
+
+
+def stream_city_profiles(path, stations_path=None, pollutants=None, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Per-city yearly, monthly, hourly and overall pollutant means in one pass.
+    Returns dict of DataFrames indexed by (City, Year) / (City, Month) /
+    (City, Hour) / City. Memory depends only on the number of cities.
+    """
+    pollutants = POLLUTANTS if pollutants is None else pollutants
+    codes = StationCodes.from_csv(stations_path) if stations_path is not None else None
+
+    aggs = None
+    for chunk in iter_chunks(path, pollutants=pollutants, chunksize=chunksize):
+        if aggs is None:
+            by_code = 'City' not in chunk.columns
+            if by_code and codes is None:
+                raise ValueError("stations_path is required when the CSV has no City column")
+            key = 'city_code' if by_code else 'City'
+            aggs = {
+                'yearly': PartialAggregate([key, 'Year'], pollutants),
+                'monthly': PartialAggregate([key, 'Month'], pollutants),
+                'hourly': PartialAggregate([key, 'Hour'], pollutants),
+                'overall': PartialAggregate([key], pollutants),
+            }
+        if by_code:
+            chunk = codes.attach(chunk)
+        dt = chunk['Datetime'].dt
+        chunk = chunk.assign(Year=dt.year, Month=dt.month, Hour=dt.hour)
+        for agg in aggs.values():
+            agg.update(chunk)
+
+    if aggs is None:
+        return {}
+    out = {}
+    for name, agg in aggs.items():
+        means = agg.mean()
+        index = ['City'] + agg.keys[1:]
+        if means.empty:
+            # header-only input: nothing to decode
+            out[name] = pd.DataFrame(columns=index + list(pollutants)).set_index(index)
+        elif by_code:
+            # back to a City-labelled index
+            out[name] = codes.decode(means, 'city_code').set_index(index)
+        else:
+            out[name] = means
+    return out
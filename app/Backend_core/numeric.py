@@ -0,0 +1,222 @@
+# app/Backend_core/numeric.py
+"""
+Column statistics, mean imputation, standardization and covariance PCA of
+2D float arrays, shared by the dataana CLI and the Backend_core analyses
+(see similarity). NaN marks a missing value throughout.
+"""
+import numpy as np
+
+
+def _column_means(arr, valid):
+    """(non-NaN count, mean) of every column; the mean is NaN for all-NaN columns."""
+    counts = np.count_nonzero(valid, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(valid, arr, 0.0).sum(axis=0) / counts
+    return counts, means
+
+
+def _summary_dict(nrows, counts, means, stds, mins, maxs):
+    """The summarize_array dict from per-column statistics."""
+    per_col = []
+    for j in range(len(counts)):
+        if counts[j] == 0:
+            per_col.append({"col": j, "count": 0, "mean": None, "std": None, "min": None, "max": None})
+        else:
+            per_col.append({
+                "col": j,
+                "count": int(counts[j]),
+                "mean": float(means[j]),
+                "std": float(stds[j]) if counts[j] > 1 else 0.0,
+                "min": float(mins[j]),
+                "max": float(maxs[j])
+            })
+    total_nans = int(nrows * len(counts) - np.sum(counts))
+    return {"shape": (nrows, len(counts)), "total_nans": total_nans, "per_column": per_col}
+
+
+def _column_moments(arr):
+    """(count, mean, sum of squared deviations, min, max) of every column, ignoring NaNs."""
+    valid = ~np.isnan(arr)
+    counts, means = _column_means(arr, valid)
+    # one scratch array for the deviations; fmin/fmax skip NaNs without copying
+    dev = np.subtract(arr, means)
+    np.copyto(dev, 0.0, where=~valid)
+    m2 = np.einsum("ij,ij->j", dev, dev)
+    del dev
+    mins = np.fmin.reduce(arr, axis=0, initial=np.nan)
+    maxs = np.fmax.reduce(arr, axis=0, initial=np.nan)
+    return counts, means, m2, mins, maxs
+
+
+def summarize_array(arr):
+    """Return summary dict for 2D float array."""
+    arr = np.asarray(arr, dtype=float)
+    counts, means, m2, mins, maxs = _column_moments(arr)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stds = np.sqrt(m2 / (counts - 1))
+    return _summary_dict(arr.shape[0], counts, means, stds, mins, maxs)
+
+
+class RunningSummary:
+    """Streaming summarize_array: per-column count, mean, M2 (sum of squared
+       deviations), min and max, updated chunk by chunk with the parallel
+       form of Welford's algorithm, so memory is bounded by the chunk size.
+       Summaries of other chunks or files can be merge()d in; summary()
+       returns the same dict as summarize_array over all rows seen.
+    """
+
+    def __init__(self, ncols):
+        self.nrows = 0
+        self.count = np.zeros(ncols, dtype=np.int64)
+        self.mean = np.zeros(ncols, dtype=np.float64)
+        self.m2 = np.zeros(ncols, dtype=np.float64)
+        self.min = np.full(ncols, np.nan)
+        self.max = np.full(ncols, np.nan)
+
+    def _combine(self, nrows, count, mean, m2, mins, maxs):
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(total > 0, count / total, 0.0)
+        # columns without data in the chunk (count 0) have a NaN mean: keep ours
+        delta = np.where(count > 0, mean - self.mean, 0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + np.where(count > 0, m2, 0.0) + delta * delta * self.count * weight
+        self.count = total
+        self.min = np.fmin(self.min, mins)
+        self.max = np.fmax(self.max, maxs)
+        self.nrows += nrows
+        return self
+
+    @classmethod
+    def from_summary(cls, summary):
+        """Rebuild the running state from a summarize_array dict (e.g. to merge per-file summaries)."""
+        per_col = summary["per_column"]
+        stats = cls(len(per_col))
+        stats.nrows = int(summary["shape"][0])
+        for j, c in enumerate(per_col):
+            if c["count"]:
+                stats.count[j] = c["count"]
+                stats.mean[j] = c["mean"]
+                stats.m2[j] = c["std"] ** 2 * (c["count"] - 1)
+                stats.min[j] = c["min"]
+                stats.max[j] = c["max"]
+        return stats
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        if chunk.ndim != 2 or chunk.shape[1] != len(self.count):
+            raise ValueError(f"expected chunks with {len(self.count)} columns, got shape {chunk.shape}")
+        return self._combine(chunk.shape[0], *_column_moments(chunk))
+
+    def merge(self, other):
+        if len(other.count) != len(self.count):
+            raise ValueError("cannot merge summaries with different numbers of columns")
+        return self._combine(other.nrows, other.count, other.mean, other.m2, other.min, other.max)
+
+    def summary(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stds = np.sqrt(self.m2 / (self.count - 1))
+        return _summary_dict(self.nrows, self.count, self.mean, stds, self.min, self.max)
+
+
+def _blocked_column_means(arr, chunk_rows):
+    """Column means ignoring NaNs (NaN for all-NaN columns), summed over row blocks."""
+    sums = np.zeros(arr.shape[1])
+    counts = np.zeros(arr.shape[1], dtype=np.int64)
+    for start in range(0, arr.shape[0], chunk_rows):
+        block = arr[start:start + chunk_rows]
+        sums += np.nansum(block, axis=0)
+        counts += np.count_nonzero(~np.isnan(block), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def impute_with_col_mean(arr, inplace=False, means=None, chunk_rows=None):
+    """Replace NaNs with their column mean (0.0 for all-NaN columns).
+       inplace=True fills arr itself when it is already a float64 array
+       instead of working on a copy. means fills with precomputed column
+       means (e.g. RunningSummary.mean) instead; chunk_rows computes and
+       fills by row blocks, so no arr-sized temporaries are made.
+    """
+    arr = np.asarray(arr, dtype=float) if inplace else np.array(arr, dtype=float, copy=True)
+    if chunk_rows:
+        if means is None:
+            means = _blocked_column_means(arr, chunk_rows)
+        means = np.where(np.isnan(means), 0.0, means)
+        for start in range(0, arr.shape[0], chunk_rows):
+            block = arr[start:start + chunk_rows]
+            np.copyto(block, means, where=np.isnan(block))
+        return arr
+    missing = np.isnan(arr)
+    if means is None:
+        _, means = _column_means(arr, ~missing)
+    means = np.where(np.isnan(means), 0.0, means)
+    np.copyto(arr, np.broadcast_to(means, arr.shape), where=missing)
+    return arr
+
+
+def chunked_summary(arr, chunk_rows):
+    """RunningSummary of arr fed by row blocks (temporaries bounded by chunk_rows)."""
+    stats = RunningSummary(arr.shape[1])
+    for start in range(0, arr.shape[0], chunk_rows):
+        stats.update(arr[start:start + chunk_rows])
+    return stats
+
+
+def normalize_zero_mean_unit_var(arr, inplace=False, chunk_rows=None):
+    """Standardize columns to zero mean and unit (ddof=1) std; constant
+       columns are only centered. inplace=True overwrites arr when it is
+       already a float64 array; chunk_rows computes the column statistics
+       over row blocks instead of with full-size temporaries.
+    """
+    arr = np.asarray(arr, dtype=float) if inplace else np.array(arr, dtype=float, copy=True)
+    if chunk_rows:
+        stats = chunked_summary(arr, chunk_rows)
+        mean = stats.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(stats.m2 / (stats.count - 1))
+    else:
+        mean = np.mean(arr, axis=0)
+        std = np.std(arr, axis=0, ddof=1)
+    std_safe = np.where(std == 0, 1.0, std)
+    arr -= mean
+    arr /= std_safe
+    return arr, mean, std_safe
+
+
+def sorted_eig(cov, n_components=None):
+    """(eigenvectors as columns, eigenvalues) of a symmetric matrix, largest first."""
+    eigvals, eigvecs = np.linalg.eigh(cov)  # symmetric
+    idx = np.argsort(eigvals)[::-1]
+    eigvals = eigvals[idx]
+    eigvecs = eigvecs[:, idx]
+    if n_components is not None:
+        eigvals = eigvals[:n_components]
+        eigvecs = eigvecs[:, :n_components]
+    return eigvecs, eigvals
+
+
+def center_and_project(arr, mean, components, out=None, chunk_rows=None):
+    """(arr - mean) @ components without a centered copy of arr, optionally by row blocks."""
+    n = arr.shape[0]
+    if out is None:
+        out = np.empty((n, components.shape[1]), dtype=np.result_type(arr, components))
+    offset = mean @ components
+    step = chunk_rows or max(n, 1)
+    for start in range(0, n, step):
+        np.matmul(arr[start:start + step], components, out=out[start:start + step])
+        out[start:start + step] -= offset
+    return out
+
+
+def pca_via_covariance(arr, n_components=None):
+    """
+    arr should be centered (or not; this function computes cov of arr).
+    returns (components, eigenvalues, projected_data)
+    components: columns are eigenvectors (shape = n_features x n_components)
+    """
+    arr = np.asarray(arr, dtype=float)
+    cov = np.cov(arr, rowvar=False)
+    eigvecs, eigvals = sorted_eig(cov, n_components)
+    projected = center_and_project(arr, np.mean(arr, axis=0), eigvecs)
+    return eigvecs, eigvals, projected
@@ -0,0 +1,277 @@
+# app/Backend_core/pipeline.py
+"""
+Incremental ETL from station_hour.csv + stations.csv to the complete
+city x hour table (what data_analysis/analysis.py used to rebuild by hand).
+
+Stages:
+    load      - stream station_hour.csv in pruned, typed chunks
+    merge     - attach City to every row through stations.csv
+    aggregate - per (city code, Datetime) sums and counts   [checkpointed]
+    complete  - means on the full city x hour grid     [checkpointed]
+
+The aggregate checkpoint remembers how many bytes of station_hour.csv have
+been consumed, always up to the end of a complete line: a row still being
+written by another process is left for the next run. When rows are appended
+to the file, only the new bytes are parsed; their sums/counts are merged
+into the saved totals (so hours that were already partly present stay exact)
+and only the touched time range of the complete table is rewritten.
+
+A full rebuild is triggered when stations.csv or the pollutant list
+changes, when the file shrinks, or when the first HEAD_BYTES or the
+HEAD_BYTES just before the checkpoint differ from the last run. Edits
+elsewhere in the already-consumed bytes are not detected; run with
+full=True after rewriting the middle of the file.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .grid import complete_city_hour_grid
+from .ingest import DEFAULT_CHUNKSIZE, POLLUTANTS, PartialAggregate, StationCodes, iter_chunks
+
+HEAD_BYTES = 64 * 1024
+
+
+def _file_digest(path, limit: int = None, start: int = 0) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        h.update(fh.read(limit) if limit is not None else fh.read())
+    return h.hexdigest()
+
+
+def _last_line_end(path, start: int, end: int) -> int:
+    """Offset just past the last b'\\n' in [start, end) of the file, or start if there is none."""
+    with open(path, "rb") as fh:
+        pos = end
+        while pos > start:
+            lo = max(start, pos - HEAD_BYTES)
+            fh.seek(lo)
+            cut = fh.read(pos - lo).rfind(b"\n")
+            if cut >= 0:
+                return lo + cut + 1
+            pos = lo
+    return start
+
+
+class CityHourlyPipeline:
+    """
+    Build and incrementally refresh the complete city-hour table.
+
+    workdir holds state.json plus the checkpoint of each stage. `years`
+    fixes the grid length from the first timestamp (5, like the original
+    script); None spans up to the last timestamp instead.
+    """
+
+    STATE_FILE = "state.json"
+    TOTALS_FILE = "city_hour_totals.pkl"
+    OUTPUT_FILE = "city_hourly_complete.pkl"
+    # totals are keyed by the integer city code from StationCodes (stable while
+    # stations.csv is unchanged, which the fingerprint guarantees)
+    KEYS = ['city_code', 'Datetime']
+
+    def __init__(self, station_hour_path, stations_path, workdir, pollutants=None, years: int = 5,
+                 chunksize: int = DEFAULT_CHUNKSIZE, log=print):
+        self.station_hour_path = Path(station_hour_path)
+        self.stations_path = Path(stations_path)
+        self.workdir = Path(workdir)
+        self.pollutants = list(POLLUTANTS if pollutants is None else pollutants)
+        self.years = years
+        self.chunksize = chunksize
+        self.log = log
+        self._codes = None
+
+    # ---- state -------------------------------------------------------
+
+    def _load_state(self):
+        path = self.workdir / self.STATE_FILE
+        if not path.exists():
+            return {}
+        with open(path, "r") as fh:
+            return json.load(fh)
+
+    def _save_state(self, state):
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        path = self.workdir / self.STATE_FILE
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "w") as fh:
+            json.dump(state, fh, indent=2)
+        os.replace(tmp, path)
+
+    def _save_frame(self, frame, name):
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        path = self.workdir / name
+        tmp = path.with_name(path.name + ".tmp")
+        frame.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    def _fingerprint(self, offset: int):
+        """Digests of the inputs as consumed up to `offset` bytes of station_hour.csv."""
+        tail = max(0, offset - HEAD_BYTES)
+        return {
+            'head': _file_digest(self.station_hour_path, min(offset, HEAD_BYTES)),
+            'tail': _file_digest(self.station_hour_path, offset - tail, start=tail),
+            'stations': _file_digest(self.stations_path),
+            'pollutants': self.pollutants,
+            'keys': self.KEYS
+        }
+
+    def pending_bytes(self, state=None):
+        """
+        (start, end, rebuild): byte range of station_hour.csv still to
+        aggregate. end is just past the last complete line, so an unfinished
+        row at the end of the file is picked up by a later run.
+        """
+        if not self.station_hour_path.exists():
+            raise FileNotFoundError(f"CSV not found: {self.station_hour_path}")
+        state = self._load_state() if state is None else state
+        size = self.station_hour_path.stat().st_size
+        done = state.get('aggregate')
+        if (not done or size < done['offset'] or not (self.workdir / self.TOTALS_FILE).exists()
+                or done['fingerprint'] != self._fingerprint(done['offset'])):
+            return 0, _last_line_end(self.station_hour_path, 0, size), True
+        start = done['offset']
+        return start, _last_line_end(self.station_hour_path, start, size), False
+
+    # ---- stages ------------------------------------------------------
+
+    def load(self, start: int = 0, end: int = None):
+        """Stage 1: pruned, typed chunks of station_hour.csv within [start, end)."""
+        return iter_chunks(self.station_hour_path, pollutants=self.pollutants,
+                           chunksize=self.chunksize, start=start, end=end)
+
+    @property
+    def codes(self):
+        if self._codes is None:
+            self._codes = StationCodes.from_csv(self.stations_path)
+        return self._codes
+
+    def merge(self, chunk):
+        """Stage 2: attach int16 city/state codes from stations.csv (unknown stations are dropped)."""
+        return self.codes.attach(chunk)
+
+    def aggregate(self, full: bool = False):
+        """
+        Stage 3: fold new rows into the per (City, Datetime) sums/counts.
+        Returns the number of new rows read.
+        """
+        state = self._load_state()
+        start, end, rebuild = self.pending_bytes(state)
+        rebuild = rebuild or full
+        if rebuild:
+            start = 0
+        if start >= end and not rebuild:
+            self.log("aggregate: no new rows")
+            return 0
+
+        agg = PartialAggregate(self.KEYS, self.pollutants)
+        n_rows = 0
+        t_min = t_max = None
+        for chunk in self.load(start, end):
+            chunk = self.merge(chunk)
+            n_rows += len(chunk)
+            if len(chunk):
+                lo, hi = chunk['Datetime'].min(), chunk['Datetime'].max()
+                t_min = lo if t_min is None or lo < t_min else t_min
+                t_max = hi if t_max is None or hi > t_max else t_max
+            agg.update(chunk)
+
+        if not rebuild:
+            saved = pd.read_pickle(self.workdir / self.TOTALS_FILE)
+            agg = PartialAggregate.from_totals(agg.keys, agg.columns, saved).merge(agg)
+        self._save_frame(agg.totals, self.TOTALS_FILE)
+
+        # remember what the complete stage has to refresh
+        pending = state.get('pending')
+        if rebuild or pending == 'full':
+            pending = 'full'
+        elif t_min is not None:
+            if pending:
+                t_min = min(t_min, pd.Timestamp(pending[0]))
+                t_max = max(t_max, pd.Timestamp(pending[1]))
+            pending = [str(t_min), str(t_max)]
+
+        state['aggregate'] = {'offset': end, 'fingerprint': self._fingerprint(end), 'rows': n_rows}
+        state['pending'] = pending
+        self._save_state(state)
+        self.log(f"aggregate: {n_rows} rows from bytes {start}-{end}" + (" (full rebuild)" if rebuild else ""))
+        return n_rows
+
+    def complete(self):
+        """
+        Stage 4: city-hour means on the full grid. Rewrites only the pending
+        time range when the grid itself is unchanged. Returns the table.
+        """
+        state = self._load_state()
+        pending = state.get('pending')
+        out_path = self.workdir / self.OUTPUT_FILE
+        if not pending and out_path.exists():
+            return pd.read_pickle(out_path)
+
+        totals = pd.read_pickle(self.workdir / self.TOTALS_FILE)
+        counts = totals['count']
+        means = self.codes.decode(totals['sum'] / counts.where(counts > 0), 'city_code')
+        means = means.dropna(subset=['City', 'Datetime'])
+        if means.empty:
+            complete = pd.DataFrame(columns=['City', 'Datetime'] + self.pollutants)
+            self.log("complete: no city-hours yet")
+            self._save_frame(complete, self.OUTPUT_FILE)
+            state['grid'] = None
+            state['complete'] = {'offset': state.get('aggregate', {}).get('offset'), 'empty_city_hours': 0}
+            state['pending'] = None
+            self._save_state(state)
+            return complete
+
+        grid = state.get('grid')
+        cities = sorted(str(c) for c in means['City'].unique())
+        start = means['Datetime'].min()
+        end = start + pd.DateOffset(years=self.years) if self.years is not None else means['Datetime'].max()
+
+        same_grid = (
+            pending != 'full' and grid is not None and out_path.exists()
+            and grid['cities'] == cities and pd.Timestamp(grid['start']) == start
+            and pd.Timestamp(grid['end']) == end
+        )
+        if same_grid:
+            complete = pd.read_pickle(out_path)
+            t_lo, t_hi = pd.Timestamp(pending[0]), pd.Timestamp(pending[1])
+            window = means[(means['Datetime'] >= t_lo) & (means['Datetime'] <= t_hi) & (means['Datetime'] <= end)]
+            # rows are laid out city-major on an hourly grid: position = city * n_hours + hour
+            n_hours = grid['n_hours']
+            city_pos = pd.Index(cities).get_indexer(window['City'])
+            hour_pos = ((window['Datetime'] - start) // pd.Timedelta(hours=1)).to_numpy()
+            rows = city_pos * n_hours + hour_pos
+            cols = [c for c in self.pollutants if c in complete.columns]
+            values = complete[cols].to_numpy()
+            values[rows] = window[cols].to_numpy(dtype=values.dtype, na_value=np.nan)
+            complete[cols] = values
+            self.log(f"complete: refreshed {len(window)} city-hours in {t_lo} .. {t_hi}")
+        else:
+            complete, n_filled = complete_city_hour_grid(means, start=start, end=end, cities=cities)
+            self.log(f"complete: rebuilt {len(complete)} city-hours, filled {n_filled} missing slots")
+        n_hours = len(complete) // max(1, len(cities))
+        cols = [c for c in self.pollutants if c in complete.columns]
+        n_empty = int(complete[cols].isna().all(axis=1).sum())
+
+        self._save_frame(complete, self.OUTPUT_FILE)
+        state['grid'] = {'cities': cities, 'start': str(start), 'end': str(end), 'n_hours': n_hours}
+        state['complete'] = {'offset': state.get('aggregate', {}).get('offset'), 'empty_city_hours': n_empty}
+        state['pending'] = None
+        self._save_state(state)
+        return complete
+
+    def run(self, full: bool = False):
+        """Run every stage; only new input is processed unless full=True."""
+        self.aggregate(full=full)
+        return self.complete()
+
+    def export_csv(self, path, dropna: bool = True):
+        """Write the complete table as CSV (optionally only hours with data)."""
+        complete = pd.read_pickle(self.workdir / self.OUTPUT_FILE)
+        cols = [c for c in self.pollutants if c in complete.columns]
+        if dropna:
+            complete = complete.dropna(subset=cols, how='all')
+        complete.to_csv(path, index=False)
+        return path
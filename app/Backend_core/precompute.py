@@ -0,0 +1,138 @@
+# app/Backend_core/precompute.py
+"""
+Headless batch precompute of the historical analysis for every city.
+
+Runs HistoricalAnalyzer for each city across a process pool and stores the
+results in the analyzer cache (one <city>.json summary + <city>.npz of
+aggregated series per city), optionally rendering the PNG plots as well.
+The all-city quantile sketches (sketches.npz), leaderboard totals
+(leaderboard.npz) and similar-city embeddings (similarity.npz) are built
+alongside.
+HistoricalView reads the same cache, so a nightly run turns interactive
+requests into cache hits.
+
+Cities that already have a valid cache entry for the current CSV are
+skipped, so an interrupted run can simply be started again.
+
+Run from app/:
+    python -m Backend_core.precompute --jobs 8 --plots
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+DEFAULT_CSV = "data_analysis/Data/data.csv"
+DEFAULT_STATIONS = "data_analysis/Data/stations.csv"
+DEFAULT_CACHE_DIR = "data_analysis/Data/precomputed"
+
+_analyzer = None
+
+
+def list_cities(csv_path=DEFAULT_CSV, stations_path=None):
+    """Sorted unique city names from stations.csv if given, else from the data CSV."""
+    import pandas as pd
+    if stations_path is not None:
+        cities = pd.read_csv(stations_path, usecols=['City'], dtype=str, encoding='utf-8-sig')['City']
+    else:
+        header = list(pd.read_csv(csv_path, nrows=0).columns)
+        col = 'City' if 'City' in header else 'city'
+        cities = pd.read_csv(csv_path, usecols=[col], dtype=str)[col]
+    return sorted(c.strip() for c in cities.dropna().unique() if c.strip())
+
+
+def _init_worker(csv_path, plots_dir, cache_dir):
+    # one analyzer (and one loaded DataFrame) per worker process
+    global _analyzer
+    from .historical_analyzer import HistoricalAnalyzer
+    _analyzer = HistoricalAnalyzer(csv_path, plots_dir=plots_dir, cache_dir=cache_dir)
+
+
+def _process_city(city, plots, max_points):
+    """Compute and cache one city. Returns (city, status, seconds)."""
+    started = time.perf_counter()
+    series = _analyzer.generate_city_series(city, max_points=max_points, use_cache=False)
+    if series is None:
+        return city, 'no-data', time.perf_counter() - started
+    analysis = _analyzer.generate_city_analysis(city, use_cache=False) if plots else None
+    _analyzer.save_cached(city, series=series, analysis=analysis, max_points=max_points)
+    return city, 'ok', time.perf_counter() - started
+
+
+def precompute(cities, csv_path=DEFAULT_CSV, cache_dir=DEFAULT_CACHE_DIR, plots_dir=None,
+               plots=False, max_points=500, jobs=None, force=False, log=print):
+    """
+    Precompute every city in `cities`. Returns {city: status} where status is
+    'ok', 'cached', 'no-data' or 'error: ...'. A failing city does not stop the run.
+    """
+    from .historical_analyzer import HistoricalAnalyzer
+    checker = HistoricalAnalyzer(csv_path, plots_dir=plots_dir, cache_dir=cache_dir)
+
+    results = {}
+    todo = []
+    for city in cities:
+        kind = 'analysis' if plots else 'series'
+        if not force and checker.load_cached(city, kind, max_points=None if plots else max_points) is not None:
+            results[city] = 'cached'
+        else:
+            todo.append(city)
+    log(f"{len(cities)} cities: {len(results)} already cached, {len(todo)} to compute")
+
+    # all-city aggregates (no-ops when sketches.npz / leaderboard.npz / similarity.npz are current)
+    checker.quantile_sketches()
+    checker.leaderboard()
+    checker.similarity_index()
+
+    if todo:
+        # clean (gap-fill) the data and compute the correlation moments once
+        # here so every worker loads them from the cache
+        checker.clean_df()
+        checker.correlation_moments()
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(str(csv_path), plots_dir, str(cache_dir))) as pool:
+            futures = {pool.submit(_process_city, city, plots, max_points): city for city in todo}
+            for done, fut in enumerate(as_completed(futures), 1):
+                city = futures[fut]
+                try:
+                    _, status, seconds = fut.result()
+                    log(f"[{done}/{len(todo)}] {city}: {status} ({seconds:.1f}s)")
+                except Exception as ex:
+                    status = f"error: {ex}"
+                    log(f"[{done}/{len(todo)}] {city}: {status}")
+                results[city] = status
+
+    index_path = Path(cache_dir) / "index.json"
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(index_path, "w") as fh:
+        json.dump({'csv': str(csv_path), 'cities': results}, fh, indent=2)
+    return results
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Precompute historical analysis for all cities.")
+    p.add_argument("--csv", default=DEFAULT_CSV, help="City-level hourly CSV (data.csv)")
+    p.add_argument("--stations", default=None,
+                   help=f"Take the city list from a stations CSV (e.g. {DEFAULT_STATIONS}) instead of --csv")
+    p.add_argument("--cities", nargs="*", default=None, help="Only these cities")
+    p.add_argument("--outdir", default=DEFAULT_CACHE_DIR, help="Cache directory for summaries and series")
+    p.add_argument("--plots", action="store_true", help="Also render the PNG plots")
+    p.add_argument("--plots-dir", default=None, help="Where to write plots (default: assets/plots)")
+    p.add_argument("--max-points", type=int, default=500, help="Points kept in the full-history series")
+    p.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    p.add_argument("--force", action="store_true", help="Recompute cities that are already cached")
+    args = p.parse_args(argv)
+
+    cities = args.cities or list_cities(args.csv, args.stations)
+    results = precompute(cities, csv_path=args.csv, cache_dir=args.outdir, plots_dir=args.plots_dir,
+                         plots=args.plots, max_points=args.max_points, jobs=args.jobs, force=args.force)
+    failed = [c for c, s in results.items() if s.startswith('error')]
+    print(f"Done: {len(results) - len(failed)} ok/cached, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
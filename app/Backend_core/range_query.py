@@ -0,0 +1,142 @@
+# app/Backend_core/range_query.py
+"""
+Time-range queries over hourly data sorted by City, then Datetime.
+
+TimeRangeIndex records where each city's rows start and end once; a query
+then binary-searches that city's datetime slice for the window and works on
+array views, so nothing is copied or filtered across the whole frame.
+
+    idx = TimeRangeIndex(clean_df, columns=pollutants)
+    idx.aggregate('Delhi', '2019-11', '2020-01', ['PM2.5', 'NO2'])
+"""
+import numpy as np
+import pandas as pd
+
+AGGREGATES = ('mean', 'min', 'max', 'count')
+
+
+def _bound(value, end: bool):
+    """
+    Timestamp for a query bound. Strings cover the whole period they name,
+    so an end of '2020-01' includes all of January 2020.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        period = pd.Period(value)
+        return period.end_time if end else period.start_time
+    return pd.Timestamp(value)
+
+
+class TimeRangeIndex:
+    """
+    Row ranges per city plus one contiguous block of values.
+    `frame` must be sorted by `group` then `time` (as HistoricalAnalyzer.clean_df is).
+    """
+
+    def __init__(self, frame, columns, group: str = 'City', time: str = 'Datetime'):
+        self.columns = list(columns)
+        self._column_index = {c: j for j, c in enumerate(self.columns)}
+        self.times = frame[time].to_numpy()
+        self.values = frame[self.columns].to_numpy(dtype=np.float32, na_value=np.nan)
+
+        keys = frame[group].to_numpy()
+        n = len(keys)
+        is_start = np.ones(n, dtype=bool)
+        is_start[1:] = keys[1:] != keys[:-1]
+        starts = np.flatnonzero(is_start)
+        ends = np.append(starts[1:], n)
+
+        self.names = [str(keys[s]) for s in starts]
+        self._slices = {}
+        for name, s, e in zip(self.names, starts, ends):
+            if name in self._slices:
+                raise ValueError(f"frame is not sorted by {group}: {name} appears twice")
+            self._slices[name] = (int(s), int(e))
+        self._exact = {name: i for i, name in enumerate(self.names)}
+        self._lower_names = [name.lower() for name in self.names]
+        # lowercase alias -> position, or None when several names share it
+        self._lower = {}
+        for i, name in enumerate(self._lower_names):
+            self._lower[name] = None if name in self._lower else i
+
+    def position(self, city: str):
+        """
+        Index into self.names of a city: exact match, else case-insensitive
+        match, else first name containing it.
+        """
+        city = str(city).strip()
+        if city in self._exact:
+            return self._exact[city]
+        key = city.lower()
+        if key in self._lower:
+            i = self._lower[key]
+            if i is None:
+                raise ValueError(f"Ambiguous case-insensitive city name: {city}")
+            return i
+        for i, name in enumerate(self._lower_names):
+            if key in name:
+                return i
+        return None
+
+    def lookup(self, city: str):
+        """(first_row, end_row) of a city, matched as in position()."""
+        i = self.position(city)
+        return None if i is None else self._slices[self.names[i]]
+
+    def window(self, city: str, start=None, end=None):
+        """Row range [lo, hi) of `city` between start and end (inclusive), via binary search."""
+        rows = self.lookup(city)
+        if rows is None:
+            raise KeyError(f"Unknown city: {city}")
+        lo, hi = rows
+        times = self.times[lo:hi]
+        start, end = _bound(start, end=False), _bound(end, end=True)
+        a = 0 if start is None else int(np.searchsorted(times, np.datetime64(start).astype(times.dtype), side='left'))
+        b = len(times) if end is None else int(np.searchsorted(times, np.datetime64(end).astype(times.dtype), side='right'))
+        return lo + a, lo + max(a, b)
+
+    def _column_positions(self, pollutants):
+        if pollutants is None:
+            return list(range(len(self.columns))), self.columns
+        try:
+            return [self._column_index[p] for p in pollutants], list(pollutants)
+        except KeyError as ex:
+            raise KeyError(f"Unknown pollutant: {ex.args[0]}") from None
+
+    def series(self, city: str, start=None, end=None, pollutants=None):
+        """
+        Raw hourly values in the window: (times, values, names). With all
+        pollutants (or one contiguous run of them) both arrays are views.
+        """
+        lo, hi = self.window(city, start, end)
+        cols, names = self._column_positions(pollutants)
+        contiguous = bool(cols) and cols == list(range(cols[0], cols[-1] + 1))
+        if contiguous:
+            values = self.values[lo:hi, cols[0]:cols[-1] + 1]
+        else:
+            values = self.values[lo:hi][:, cols]
+        return self.times[lo:hi], values, names
+
+    def aggregate(self, city: str, start=None, end=None, pollutants=None, how=AGGREGATES):
+        """{pollutant: {'mean': .., 'min': .., 'max': .., 'count': ..}} over the window (NaNs ignored)."""
+        _, values, names = self.series(city, start, end, pollutants)
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=0)
+        out = {name: {} for name in names}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats = {
+                'count': counts,
+                'mean': np.where(valid, values, 0).sum(axis=0, dtype=np.float64) / counts,
+                'min': np.where(valid, values, np.inf).min(axis=0, initial=np.inf),
+                'max': np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf),
+            }
+        for key in how:
+            if key not in stats:
+                raise ValueError(f"how must be a subset of {AGGREGATES}")
+            for j, name in enumerate(names):
+                if key == 'count':
+                    out[name][key] = int(counts[j])
+                else:
+                    out[name][key] = float(stats[key][j]) if counts[j] else None
+        return out
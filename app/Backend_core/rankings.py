@@ -0,0 +1,190 @@
+# app/Backend_core/rankings.py
+"""
+Leaderboards across all cities from precomputed per-city monthly totals.
+
+CityLeaderboard keeps dense (city, year, month, pollutant) sums and counts,
+so the mean of any period (years x months, e.g. winters) for every city is
+two sums and a division, and rankings use a partial sort (argpartition)
+instead of sorting or recomputing anything per city.
+
+    board = analyzer.leaderboard()
+    board.top_k('PM2.5', k=10, months='winter')
+    board.yoy_change('PM2.5', 2020, k=5)
+"""
+import json
+import numpy as np
+from .ingest import PartialAggregate
+
+# Indian meteorological seasons
+SEASONS = {
+    'winter': [12, 1, 2],
+    'summer': [3, 4, 5],
+    'monsoon': [6, 7, 8, 9],
+    'post-monsoon': [10, 11],
+}
+
+
+def _months(months):
+    if months is None:
+        return None
+    if isinstance(months, str):
+        try:
+            return SEASONS[months.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown season {months!r}; expected one of {list(SEASONS)}") from None
+    return [months] if np.isscalar(months) else list(months)
+
+
+def _nan_mean(values, axis):
+    """Mean over non-NaN values along axis (NaN where there are none), without warnings."""
+    valid = ~np.isnan(values)
+    n = valid.sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, np.where(valid, values, 0.0).sum(axis=axis) / n, np.nan)
+
+
+def _rank(values, k: int, ascending: bool = False):
+    """Positions of the k largest (or smallest) non-NaN values, best first."""
+    valid = np.flatnonzero(~np.isnan(values))
+    key = values[valid] if ascending else -values[valid]
+    k = min(k, len(valid))
+    if k <= 0:
+        return valid[:0]
+    part = np.argpartition(key, k - 1)[:k] if k < len(valid) else np.arange(len(valid))
+    return valid[part[np.argsort(key[part], kind='stable')]]
+
+
+class CityLeaderboard:
+    """Dense per-city, per-year, per-month sums and counts of every pollutant."""
+
+    def __init__(self, cities, years, pollutants, sums, counts):
+        self.cities = list(cities)
+        self.years = [int(y) for y in years]
+        self.pollutants = list(pollutants)
+        self.sums = sums
+        self.counts = counts
+
+    @classmethod
+    def from_frame(cls, frame, pollutants, group: str = 'City', time: str = 'Datetime'):
+        """Build from an hourly frame with `group`, `time` and pollutant columns."""
+        cols = [p for p in pollutants if p in frame.columns]
+        dt = frame[time].dt
+        keyed = frame[[group] + cols].assign(Year=dt.year, Month=dt.month)
+        totals = PartialAggregate([group, 'Year', 'Month'], cols).update(keyed).totals
+        return cls.from_totals(totals, cols)
+
+    @classmethod
+    def from_totals(cls, totals, pollutants):
+        """Build from PartialAggregate totals indexed by (City, Year, Month)."""
+        pollutants = list(pollutants)
+        cities, years, _ = (totals.index.levels[i] if len(totals) else [] for i in range(3))
+        cities, years = [str(c) for c in cities], [int(y) for y in years]
+        shape = (len(cities), len(years), 12, len(pollutants))
+        sums = np.zeros(shape, dtype=np.float64)
+        counts = np.zeros(shape, dtype=np.int64)
+        if len(totals):
+            c = totals.index.codes[0]
+            y = totals.index.codes[1]
+            m = totals.index.get_level_values(2).to_numpy(dtype=np.int64) - 1
+            for j, p in enumerate(pollutants):
+                if p in totals['sum'].columns:
+                    sums[c, y, m, j] = totals['sum'][p].to_numpy(dtype=np.float64)
+                    counts[c, y, m, j] = totals['count'][p].to_numpy(dtype=np.int64)
+        return cls(cities, years, pollutants, sums, counts)
+
+    def save(self, path, **meta):
+        meta = dict(meta, cities=self.cities, years=self.years, pollutants=self.pollutants)
+        np.savez(path, sums=self.sums, counts=self.counts, meta=np.asarray(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path):
+        """Returns (board, meta) where meta holds whatever was passed to save()."""
+        with np.load(path) as npz:
+            meta = json.loads(str(npz['meta']))
+            board = cls(meta['cities'], meta['years'], meta['pollutants'], npz['sums'], npz['counts'])
+        return board, meta
+
+    def _pollutant(self, pollutant: str):
+        try:
+            return self.pollutants.index(pollutant)
+        except ValueError:
+            raise KeyError(f"Unknown pollutant: {pollutant}") from None
+
+    def _year_rows(self, years):
+        years = [years] if np.isscalar(years) else list(years)
+        return [self.years.index(int(y)) for y in years if int(y) in self.years]
+
+    def _select(self, pollutant, years=None, months=None):
+        """(sums, counts) per city over the selected years and months."""
+        j = self._pollutant(pollutant)
+        sums, counts = self.sums[..., j], self.counts[..., j]
+        if years is not None:
+            rows = self._year_rows(years)
+            sums, counts = sums[:, rows], counts[:, rows]
+        months = _months(months)
+        if months is not None:
+            cols = [int(m) - 1 for m in months]
+            sums, counts = sums[:, :, cols], counts[:, :, cols]
+        return sums.sum(axis=(1, 2)), counts.sum(axis=(1, 2))
+
+    def means(self, pollutant: str, years=None, months=None):
+        """Mean of `pollutant` per city (aligned with self.cities) over the period; NaN without data."""
+        sums, counts = self._select(pollutant, years, months)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def top_k(self, pollutant: str, k: int = 10, years=None, months=None, ascending: bool = False):
+        """
+        The k most polluted cities (ascending=True: the k cleanest) for the
+        period; years / months are a value, a list, or None for all (months
+        may also be a SEASONS name). Returns [{'city', 'value', 'count'}, ...].
+        """
+        sums, counts = self._select(pollutant, years, months)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(counts > 0, sums / counts, np.nan)
+        return [{'city': self.cities[i], 'value': float(values[i]), 'count': int(counts[i])}
+                for i in _rank(values, k, ascending)]
+
+    def yoy_change(self, pollutant: str, year: int, base_year: int = None, months=None,
+                   k: int = 10, improved: bool = True):
+        """
+        Percent change of the period mean from base_year (default year - 1) to
+        year. improved=True ranks the largest decreases first, False the
+        largest increases. Returns [{'city', 'change_pct', 'before', 'after'}, ...].
+        """
+        base_year = year - 1 if base_year is None else base_year
+        before = self.means(pollutant, base_year, months)
+        after = self.means(pollutant, year, months)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change = np.where(before > 0, (after - before) / before * 100.0, np.nan)
+        return [{'city': self.cities[i], 'change_pct': float(change[i]),
+                 'before': float(before[i]), 'after': float(after[i])}
+                for i in _rank(change, k, ascending=improved)]
+
+    def monthly_means(self, pollutant: str = None, years=None):
+        """(n_cities, 12) monthly means; pollutant=None averages the pollutant means (as HistoricalAnalyzer does)."""
+        sums, counts = self.sums, self.counts
+        if years is not None:
+            rows = self._year_rows(years)
+            sums, counts = sums[:, rows], counts[:, rows]
+        sums, counts = sums.sum(axis=1), counts.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        if pollutant is not None:
+            return means[..., self._pollutant(pollutant)]
+        return _nan_mean(means, axis=-1)
+
+    def best_months(self, pollutant: str = None, years=None):
+        """
+        Cleanest month per city and across all cities: {'overall': month,
+        'cities': {city: month}}; months are 1-12, None without data.
+        """
+        monthly = self.monthly_means(pollutant, years)
+        has_data = ~np.isnan(monthly).all(axis=1)
+        best = np.argmin(np.where(np.isnan(monthly), np.inf, monthly), axis=1) + 1
+        # every city weighs the same in the overall ranking
+        overall = _nan_mean(monthly, axis=0)
+        return {
+            'overall': int(np.nanargmin(overall)) + 1 if not np.isnan(overall).all() else None,
+            'cities': {c: (int(m) if ok else None) for c, m, ok in zip(self.cities, best, has_data)}
+        }
@@ -0,0 +1,137 @@
+# app/Backend_core/rolling.py
+"""
+NaN-aware rolling windows over hourly arrays, and the CPCB (Indian AQI)
+averaging rules built on them.
+
+All functions work on arrays whose time axis is `axis` (default 1, i.e. the
+(n_cities, n_hours, ...) layout of HourlyArrayStore / grid.dense_city_hour_array),
+so every city is handled in one vectorized pass. A window ending at hour t
+covers hours t-window+1 .. t; results with fewer than `min_periods` valid
+hours are NaN.
+"""
+import numpy as np
+
+# pollutant: (reduction, window hours, min valid hours)
+CPCB_WINDOWS = {
+    'PM2.5': ('mean', 24, 16),
+    'PM10': ('mean', 24, 16),
+    'SO2': ('mean', 24, 16),
+    'NO2': ('mean', 24, 16),
+    'NH3': ('mean', 24, 16),
+    'CO': ('max', 8, 1),
+    'O3': ('max', 8, 1),
+}
+
+# CPCB sub-index breakpoints: concentration at AQI 50, 100, 200, 300, 400
+# (CO in mg/m3, everything else in ug/m3). Above the last breakpoint the
+# last segment's slope is extended.
+CPCB_BREAKPOINTS = {
+    'PM2.5': [30, 60, 90, 120, 250],
+    'PM10': [50, 100, 250, 350, 430],
+    'NO2': [40, 80, 180, 280, 400],
+    'SO2': [40, 80, 380, 800, 1600],
+    'NH3': [200, 400, 800, 1200, 1800],
+    'CO': [1.0, 2.0, 10, 17, 34],
+    'O3': [50, 100, 168, 208, 748],
+}
+AQI_LEVELS = [0, 50, 100, 200, 300, 400]
+
+
+def rolling_sum_count(values, window: int, axis: int = 1):
+    """
+    Trailing-window sums and non-NaN counts from cumulative sums.
+    Returns (sums float64, counts int32) with the shape of `values`.
+    """
+    values = np.moveaxis(np.asarray(values), axis, 0)
+    valid = ~np.isnan(values)
+    # leading zero row so window sums are a single subtraction
+    csum = np.zeros((values.shape[0] + 1,) + values.shape[1:], dtype=np.float64)
+    np.cumsum(np.where(valid, values, 0.0), axis=0, out=csum[1:])
+    ccount = np.zeros(csum.shape, dtype=np.int32)
+    np.cumsum(valid, axis=0, out=ccount[1:])
+
+    lag = np.maximum(np.arange(1, values.shape[0] + 1) - window, 0)
+    sums = csum[1:] - csum[lag]
+    counts = ccount[1:] - ccount[lag]
+    return np.moveaxis(sums, 0, axis), np.moveaxis(counts, 0, axis)
+
+
+def rolling_mean(values, window: int, min_periods: int = None, axis: int = 1, dtype=np.float32):
+    """Trailing `window`-hour mean ignoring NaNs; NaN where fewer than min_periods values."""
+    min_periods = window if min_periods is None else min_periods
+    sums, counts = rolling_sum_count(values, window, axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = sums / counts
+    out[counts < max(1, min_periods)] = np.nan
+    return out.astype(dtype, copy=False)
+
+
+def rolling_max(values, window: int, min_periods: int = 1, axis: int = 1, dtype=np.float32):
+    """Trailing `window`-hour maximum ignoring NaNs; NaN where fewer than min_periods values."""
+    values = np.moveaxis(np.asarray(values, dtype=dtype), axis, 0)
+    padded = np.concatenate([np.full((window - 1,) + values.shape[1:], np.nan, dtype=dtype), values])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+    out = np.full(values.shape, -np.inf, dtype=dtype)
+    for k in range(window):
+        np.fmax(out, windows[..., k], out=out)
+    out[np.isinf(out)] = np.nan
+    if min_periods > 1:
+        _, counts = rolling_sum_count(values, window, axis=0)
+        out[counts < min_periods] = np.nan
+    return np.moveaxis(out, 0, axis)
+
+
+def cpcb_averages(data, pollutants, axis: int = 1):
+    """
+    Apply the CPCB averaging rule of every pollutant in CPCB_WINDOWS.
+    `data` has pollutants on its last axis (ordered as `pollutants`); returns
+    {pollutant: averaged array over the remaining axes}.
+    """
+    out = {}
+    for j, p in enumerate(pollutants):
+        rule = CPCB_WINDOWS.get(p)
+        if rule is None:
+            continue
+        how, window, min_periods = rule
+        series = data[..., j]
+        if how == 'mean':
+            out[p] = rolling_mean(series, window, min_periods, axis=axis)
+        else:
+            out[p] = rolling_max(series, window, min_periods, axis=axis)
+    return out
+
+
+def sub_index(pollutant: str, conc):
+    """CPCB sub-index for concentrations already averaged per CPCB_WINDOWS."""
+    bp = np.asarray([0.0] + CPCB_BREAKPOINTS[pollutant])
+    levels = np.asarray(AQI_LEVELS, dtype=float)
+    conc = np.asarray(conc, dtype=np.float64)
+    out = np.interp(conc, bp, levels)
+    # extend the last segment's slope beyond the top breakpoint
+    slope = (levels[-1] - levels[-2]) / (bp[-1] - bp[-2])
+    above = conc > bp[-1]
+    out[above] = levels[-1] + (conc[above] - bp[-1]) * slope
+    out[np.isnan(conc)] = np.nan
+    return out.astype(np.float32)
+
+
+def hourly_aqi(data, pollutants, axis: int = 1, min_sub_indices: int = 3):
+    """
+    Hourly CPCB AQI for every city at once: the maximum sub-index, valid only
+    if at least `min_sub_indices` sub-indices exist and one of them is PM2.5
+    or PM10. Returns (aqi, sub_indices) where sub_indices is {pollutant: array}.
+    """
+    averages = cpcb_averages(data, pollutants, axis=axis)
+    subs = {p: sub_index(p, v) for p, v in averages.items()}
+    if not subs:
+        raise ValueError("None of the CPCB pollutants are present")
+
+    stacked = np.stack(list(subs.values()))
+    available = (~np.isnan(stacked)).sum(axis=0)
+    has_pm = np.zeros(available.shape, dtype=bool)
+    for p in ('PM2.5', 'PM10'):
+        if p in subs:
+            has_pm |= ~np.isnan(subs[p])
+    aqi = np.where(np.isnan(stacked), -np.inf, stacked).max(axis=0)
+    aqi[(available < min_sub_indices) | ~has_pm] = np.nan
+    return aqi.astype(np.float32), subs
@@ -0,0 +1,118 @@
+# app/Backend_core/similarity.py
+"""
+"Cities most like X" from pollution-profile embeddings.
+
+Every city is described by its monthly (12) and hourly (24) mean of each
+pollutant. The profiles are log-scaled, missing values are filled with the
+mean over cities, every feature is standardized and the monthly and hourly
+blocks are weighted equally; numeric.pca_via_covariance then reduces them
+to a few components. Neighbours are a k-nearest-neighbour query over that
+small (n_cities, n_components) matrix: one vectorized distance computation
+and a partial sort, microseconds for a few hundred cities.
+
+    index = analyzer.similarity_index()
+    index.neighbours('Delhi', k=5)
+"""
+import json
+import numpy as np
+import pandas as pd
+from .ingest import PartialAggregate
+from .numeric import impute_with_col_mean, normalize_zero_mean_unit_var, pca_via_covariance
+
+PROFILES = {'monthly': ('Month', range(1, 13)), 'hourly': ('Hour', range(24))}
+
+DEFAULT_COMPONENTS = 8
+
+
+def profile_features(profiles):
+    """
+    (n_cities, n_features) standardized feature matrix from a list of
+    (n_cities, n_steps, P) mean profiles (NaN = no data). Each profile block
+    gets the same total weight, however many steps it has.
+    """
+    blocks = []
+    for profile in profiles:
+        flat = np.log1p(np.clip(np.asarray(profile, dtype=np.float64), 0.0, None)).reshape(len(profile), -1)
+        flat = impute_with_col_mean(flat, inplace=True)
+        flat, _, _ = normalize_zero_mean_unit_var(flat, inplace=True)
+        blocks.append(flat / np.sqrt(flat.shape[1]))
+    return np.concatenate(blocks, axis=1)
+
+
+class CitySimilarityIndex:
+    """PCA embeddings of per-city pollution profiles, one row per city."""
+
+    def __init__(self, cities, embeddings, explained=None):
+        self.cities = list(cities)
+        self.embeddings = np.asarray(embeddings, dtype=np.float64)
+        self.explained = None if explained is None else np.asarray(explained, dtype=np.float64)
+        self._lookup = {c.lower(): i for i, c in enumerate(self.cities)}
+        self._norms = (self.embeddings ** 2).sum(axis=1)
+
+    @classmethod
+    def from_profiles(cls, cities, profiles, n_components: int = DEFAULT_COMPONENTS):
+        """Build from (n_cities, n_steps, P) mean profiles aligned with cities."""
+        features = profile_features(profiles)
+        n_components = max(1, min(n_components, features.shape[1], max(len(cities) - 1, 1)))
+        if len(cities) < 2:
+            return cls(cities, np.zeros((len(cities), n_components)))
+        _, eigvals, projected = pca_via_covariance(features, n_components=n_components)
+        total = features.var(axis=0, ddof=1).sum()
+        explained = eigvals / total if total > 0 else None
+        return cls(cities, projected, explained)
+
+    @classmethod
+    def from_frame(cls, frame, pollutants, n_components: int = DEFAULT_COMPONENTS,
+                   group: str = 'City', time: str = 'Datetime'):
+        """Build from an hourly frame with `group`, `time` and pollutant columns."""
+        cols = [p for p in pollutants if p in frame.columns]
+        dt = frame[time].dt
+        keyed = frame[[group] + cols].assign(Month=dt.month, Hour=dt.hour)
+        means = {name: PartialAggregate([group, key], cols).update(keyed).mean()
+                 for name, (key, _) in PROFILES.items()}
+        cities = sorted({str(c) for m in means.values() for c in m.index.get_level_values(0)})
+        profiles = []
+        for name, (_, steps) in PROFILES.items():
+            full = pd.MultiIndex.from_product([cities, list(steps)])
+            dense = means[name].reindex(full)[cols].to_numpy(dtype=np.float64)
+            profiles.append(dense.reshape(len(cities), len(steps), len(cols)))
+        return cls.from_profiles(cities, profiles, n_components)
+
+    def save(self, path, **meta):
+        meta = dict(meta, cities=self.cities)
+        extra = {} if self.explained is None else {'explained': self.explained}
+        np.savez(path, embeddings=self.embeddings, meta=np.asarray(json.dumps(meta)), **extra)
+
+    @classmethod
+    def load(cls, path):
+        """Returns (index, meta) where meta holds whatever was passed to save()."""
+        with np.load(path) as npz:
+            meta = json.loads(str(npz['meta']))
+            explained = npz['explained'] if 'explained' in npz.files else None
+            index = cls(meta['cities'], npz['embeddings'], explained)
+        return index, meta
+
+    def position(self, city: str):
+        """Row of `city` (case-insensitive); KeyError if unknown."""
+        try:
+            return self._lookup[str(city).strip().lower()]
+        except KeyError:
+            raise KeyError(f"Unknown city: {city}") from None
+
+    def distances(self, city: str):
+        """Euclidean distance in embedding space from `city` to every city (aligned with self.cities)."""
+        i = self.position(city)
+        sq = self._norms + self._norms[i] - 2.0 * (self.embeddings @ self.embeddings[i])
+        return np.sqrt(np.maximum(sq, 0.0))
+
+    def neighbours(self, city: str, k: int = 5):
+        """The k cities with the most similar profiles, closest first: [{'city', 'distance'}, ...]."""
+        i = self.position(city)
+        dist = self.distances(city)
+        dist[i] = np.inf
+        k = max(0, min(k, len(self.cities) - 1))
+        if k == 0:
+            return []
+        part = np.argpartition(dist, k - 1)[:k]
+        order = part[np.argsort(dist[part], kind='stable')]
+        return [{'city': self.cities[j], 'distance': float(dist[j])} for j in order]
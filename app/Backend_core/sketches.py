@@ -0,0 +1,151 @@
+# app/Backend_core/sketches.py
+"""
+Mergeable quantile sketches for per-city / per-month pollutant distributions.
+
+QuantileSketchGrid holds one DDSketch-style log-bucket histogram for every
+cell of a key grid (e.g. city x month x pollutant). Buckets grow
+geometrically, so every quantile has bounded *relative* error
+(`relative_accuracy`, 1% by default). Sketches are merged by adding their
+counts, which lets them be built chunk by chunk in one streaming pass and
+combined across cities, months or files afterwards.
+"""
+import json
+import numpy as np
+import pandas as pd
+from .ingest import DEFAULT_CHUNKSIZE, POLLUTANTS, iter_chunks
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketchGrid:
+    """
+    counts has shape key_shape + (n_buckets,). Bucket 0 collects values at or
+    below min_value (zeros, negatives); bucket i > 0 covers
+    (min_value * gamma**(i-1), min_value * gamma**i].
+    """
+
+    def __init__(self, key_shape, relative_accuracy: float = 0.01, min_value: float = 1e-3,
+                 max_value: float = 1e5, counts=None):
+        self.key_shape = tuple(key_shape)
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.n_buckets = int(np.ceil(np.log(max_value / min_value) / self._log_gamma)) + 2
+        if counts is None:
+            counts = np.zeros(self.key_shape + (self.n_buckets,), dtype=np.uint32)
+        elif counts.shape != self.key_shape + (self.n_buckets,):
+            raise ValueError(f"counts has shape {counts.shape}, expected {self.key_shape + (self.n_buckets,)}")
+        self.counts = counts
+
+    def _params(self):
+        return dict(relative_accuracy=self.relative_accuracy, min_value=self.min_value, max_value=self.max_value)
+
+    def bucket(self, values):
+        """Bucket index of every value (values above max_value land in the last bucket)."""
+        values = np.asarray(values, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            idx = np.ceil(np.log(values / self.min_value) / self._log_gamma)
+        idx = np.where(values > self.min_value, idx, 0)
+        return np.clip(idx, 0, self.n_buckets - 1).astype(np.int64)
+
+    def update(self, keys, values):
+        """
+        Add `values` to the cells given by `keys` (a tuple of int arrays, one
+        per key axis, aligned with values). NaN values and negative keys are skipped.
+        """
+        values = np.asarray(values)
+        keep = ~np.isnan(values)
+        for k in keys:
+            keep &= np.asarray(k) >= 0
+        if not keep.any():
+            return self
+        cells = np.ravel_multi_index(tuple(np.asarray(k)[keep] for k in keys), self.key_shape)
+        flat = cells * self.n_buckets + self.bucket(values[keep])
+        added = np.bincount(flat, minlength=self.counts.size)
+        self.counts += added.reshape(self.counts.shape).astype(np.uint32)
+        return self
+
+    def merge(self, other):
+        """Add another grid with the same shape and parameters into this one."""
+        if other.key_shape != self.key_shape or other._params() != self._params():
+            raise ValueError("Can only merge sketches with the same shape and parameters")
+        self.counts += other.counts
+        return self
+
+    def with_counts(self, counts):
+        """New grid with the same parameters over `counts` (e.g. a slice of self.counts)."""
+        return QuantileSketchGrid(counts.shape[:-1], counts=counts, **self._params())
+
+    def combine(self, axis):
+        """New grid with the key axis/axes `axis` merged (e.g. all cities together)."""
+        return self.with_counts(self.counts.sum(axis=axis, dtype=np.uint64).astype(np.uint32))
+
+    def count(self):
+        return self.counts.sum(axis=-1)
+
+    def quantiles(self, qs=DEFAULT_QUANTILES):
+        """Array of shape key_shape + (len(qs),); NaN for empty cells."""
+        qs = np.asarray(qs, dtype=np.float64)
+        cum = np.cumsum(self.counts, axis=-1, dtype=np.uint64)
+        total = cum[..., -1:]
+        # rank of the q-quantile, 1-based, as in the nearest-rank definition
+        rank = np.maximum(np.ceil(qs * total), 1)
+        idx = np.empty(self.key_shape + (len(qs),), dtype=np.int64)
+        for j in range(len(qs)):
+            idx[..., j] = (cum < rank[..., j:j + 1]).sum(axis=-1)
+        # bucket midpoint (in the relative sense); bucket 0 reports 0
+        upper = self.min_value * self.gamma ** idx.astype(np.float64)
+        values = np.where(idx == 0, 0.0, 2 * upper / (self.gamma + 1))
+        values[np.broadcast_to(total == 0, values.shape)] = np.nan
+        return values
+
+    def save(self, path, **labels):
+        """Write counts, parameters and any JSON-serialisable axis labels to an .npz file."""
+        meta = json.dumps({'params': self._params(), 'key_shape': list(self.key_shape), 'labels': labels})
+        np.savez_compressed(path, counts=self.counts, meta=np.asarray(meta))
+
+    @classmethod
+    def load(cls, path):
+        """Returns (grid, labels)."""
+        with np.load(path) as npz:
+            meta = json.loads(str(npz['meta']))
+            grid = cls(meta['key_shape'], counts=npz['counts'], **meta['params'])
+        return grid, meta['labels']
+
+
+def build_city_month_sketches(path, cities=None, pollutants=None, chunksize: int = DEFAULT_CHUNKSIZE, **params):
+    """
+    One streaming pass over a City/Datetime CSV (data.csv) into a
+    city x month x pollutant QuantileSketchGrid. With `cities`, rows of other
+    cities are ignored; otherwise every city found is kept, in sorted order.
+    Returns (grid, cities).
+    """
+    pollutants = POLLUTANTS if pollutants is None else list(pollutants)
+    per_city = {}
+    for chunk in iter_chunks(path, pollutants=pollutants, chunksize=chunksize):
+        codes, names = pd.factorize(chunk['City'])
+        month = chunk['Datetime'].dt.month.to_numpy(dtype=np.float64, na_value=np.nan)
+        month = np.where(np.isnan(month), 0, month).astype(np.int64) - 1
+        cols = [j for j, p in enumerate(pollutants) if p in chunk.columns]
+        values = chunk[[pollutants[j] for j in cols]].to_numpy(dtype=np.float64, na_value=np.nan)
+        # one sketch per city of this chunk, then merged into the running totals
+        part = QuantileSketchGrid((len(names), 12, len(pollutants)), **params)
+        n = len(values)
+        part.update((np.repeat(codes, len(cols)), np.repeat(month, len(cols)), np.tile(cols, n)), values.ravel())
+        for k, name in enumerate(names):
+            name = str(name).strip()
+            if cities is not None and name not in cities:
+                continue
+            if name in per_city:
+                per_city[name] += part.counts[k]
+            else:
+                per_city[name] = part.counts[k].copy()
+
+    names = sorted(per_city) if cities is None else list(cities)
+    grid = QuantileSketchGrid((len(names), 12, len(pollutants)), **params)
+    for i, name in enumerate(names):
+        if name in per_city:
+            grid.counts[i] = per_city[name]
+    return grid, names
@@ -0,0 +1,133 @@
+# app/benchmarks/dataana_parse.py
+"""
+Speed of dataana's numeric type detection and extraction, per-cell vs vectorized.
+
+Writes a synthetic CSV (numeric columns with some blanks and junk, plus a
+text column), then times the original per-cell implementations (kept here
+as reference copies) against the vectorized ones in dataana, checks both
+give the same result, and prints the speedups.
+
+Run from app/:
+    python benchmarks/dataana_parse.py --rows 200000 --cols 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+import dataana  # noqa: E402
+
+
+def legacy_detect_numeric_columns(str_mat, min_numeric_fraction=0.6):
+    """detect_numeric_columns before vectorization (one is_float_string per cell)."""
+    nrows, ncols = str_mat.shape
+    numeric_cols = []
+    for j in range(ncols):
+        col = str_mat[:, j]
+        numeric_count = 0
+        tested = 0
+        for val in col[:min(nrows, 500)]:
+            tested += 1
+            if dataana.is_float_string(str(val)):
+                numeric_count += 1
+        if numeric_count / max(1, tested) >= min_numeric_fraction:
+            numeric_cols.append(j)
+    return numeric_cols
+
+
+def legacy_extract_numeric_array(str_mat, numeric_cols):
+    """extract_numeric_array before vectorization (one float() per cell)."""
+    out = np.full((str_mat.shape[0], len(numeric_cols)), np.nan, dtype=float)
+    for idx, j in enumerate(numeric_cols):
+        for i, cell in enumerate(str_mat[:, j]):
+            try:
+                out[i, idx] = float(cell)
+            except ValueError:
+                out[i, idx] = np.nan
+    return out
+
+
+def write_csv(path, rows, cols, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.normal(50, 20, size=(rows, cols))
+    text = data.astype("U12")
+    text[rng.random((rows, cols)) < 0.05] = ""
+    text[rng.random((rows, cols)) < 0.01] = "NA"
+    with open(path, "w") as fh:
+        fh.write(",".join([f"c{j}" for j in range(cols)] + ["label"]) + "\n")
+        for i in range(rows):
+            fh.write(",".join(text[i]) + f",site{i % 17}\n")
+
+
+def timed(fn, *args, repeat=1):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark dataana numeric detection/extraction.")
+    p.add_argument("--rows", type=int, default=200000, help="Rows of the synthetic CSV")
+    p.add_argument("--cols", type=int, default=8, help="Numeric columns of the synthetic CSV")
+    p.add_argument("--repeat", type=int, default=3, help="Best of this many runs")
+    p.add_argument("--json", default=None, help="Also write the timings to this JSON file")
+    args = p.parse_args()
+
+    # pandas (used by the vectorized path) is a one-off import; keep it out of the timings
+    dataana.parse_float_column(["1"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        write_csv(path, args.rows, args.cols)
+        t_read, str_mat = timed(lambda: dataana.transpose_pad(dataana.read_csv_as_strings(path)))
+
+        t_detect_old, cols_old = timed(legacy_detect_numeric_columns, str_mat, repeat=args.repeat)
+        t_detect_new, cols_new = timed(dataana.detect_numeric_columns, str_mat, repeat=args.repeat)
+        t_extract_old, arr_old = timed(legacy_extract_numeric_array, str_mat, cols_old, repeat=args.repeat)
+        t_extract_new, arr_new = timed(dataana.extract_numeric_array, str_mat, cols_new, repeat=args.repeat)
+        t_stream, (arr_stream, cols_stream) = timed(dataana.read_numeric_csv, path, repeat=args.repeat)
+
+    if cols_old != cols_new or cols_old != cols_stream:
+        print("FAIL: numeric columns differ", cols_old, cols_new, cols_stream)
+        sys.exit(1)
+    for arr in (arr_new, arr_stream):
+        if not np.array_equal(arr, arr_old, equal_nan=True):
+            print("FAIL: extracted arrays differ")
+            sys.exit(1)
+
+    t_legacy = t_read + t_detect_old + t_extract_old
+    results = {
+        "rows": args.rows,
+        "cols": args.cols,
+        "detect_numeric_columns": {"per_cell_s": t_detect_old, "vectorized_s": t_detect_new},
+        "extract_numeric_array": {"per_cell_s": t_extract_old, "vectorized_s": t_extract_new},
+        "file_to_array": {"per_cell_s": t_legacy, "vectorized_s": t_stream},
+    }
+    print(f"{args.rows} rows x {args.cols} numeric columns (best of {args.repeat})")
+    for name, label in (("detect_numeric_columns", "detect_numeric_columns"),
+                        ("extract_numeric_array", "extract_numeric_array"),
+                        ("file_to_array", "file -> array")):
+        r = results[name]
+        print(f"  {label:<24} {r['per_cell_s'] * 1000:9.1f} ms -> {r['vectorized_s'] * 1000:8.1f} ms"
+              f"  ({r['per_cell_s'] / r['vectorized_s']:.1f}x)")
+    print("  (file -> array: read_csv_as_strings + transpose_pad + per-cell detect/extract"
+          " vs read_numeric_csv)")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# app/benchmarks/lean_memory.py
+"""
+Peak-memory check for dataana's --lean mode.
+
+Runs analyze_csv_file on a synthetic numeric CSV with and without lean=True
+for several --outputs selections and compares the peak traced allocation
+(report_memory=True). Fails if lean mode does not stay below --max-ratio
+of the default peak for every selection that lets it drop arrays (asking
+for imputed, normalized and projected at once needs all three either way,
+so that selection is only reported).
+
+Run from app/:
+    python benchmarks/lean_memory.py --rows 300000 --max-ratio 0.8
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import dataana  # noqa: E402
+from numeric_paths import write_numeric_csv  # noqa: E402
+
+# (outputs, checked against --max-ratio)
+SELECTIONS = [
+    (("imputed",), True),
+    (("normalized",), True),
+    (("pca_components", "pca_eigenvalues"), True),
+    (("pca_components", "pca_eigenvalues", "projected"), True),
+    (dataana.OUTPUTS, False),
+]
+
+
+def peak_mb(path, outputs, lean, chunk_rows):
+    out = dataana.analyze_csv_file(path, outdir=None, outputs=outputs, lean=lean, chunk_rows=chunk_rows,
+                                   report_memory=True)
+    return out["summary"]["peak_memory_mb"]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Check that dataana --lean lowers peak memory.")
+    p.add_argument("--rows", type=int, default=300000, help="Rows of the synthetic CSV")
+    p.add_argument("--cols", type=int, default=12, help="Numeric columns of the synthetic CSV")
+    p.add_argument("--chunk-rows", type=int, default=20000, help="chunk_rows passed to analyze_csv_file")
+    p.add_argument("--max-ratio", type=float, default=0.8,
+                   help="Fail if a lean peak is above this fraction of the default peak")
+    args = p.parse_args()
+
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "numeric.csv")
+        write_numeric_csv(path, args.rows, cols=args.cols)
+        # first call pays for the pandas import; keep it out of the peaks
+        dataana.analyze_csv_file(path, outdir=None, outputs=("imputed",))
+        array_mb = args.rows * args.cols * 8 / 2 ** 20
+        print(f"{args.rows} x {args.cols} rows (one float64 array: {array_mb:.1f} MiB)")
+        for outputs, checked in SELECTIONS:
+            default = peak_mb(path, outputs, False, args.chunk_rows)
+            lean = peak_mb(path, outputs, True, args.chunk_rows)
+            ratio = lean / default
+            flag = ""
+            if checked and ratio > args.max_ratio:
+                flag = "  FAIL"
+                failed.append(outputs)
+            elif not checked:
+                flag = "  (not checked)"
+            print(f"  {','.join(outputs):<58} default {default:7.1f} MiB  lean {lean:7.1f} MiB"
+                  f"  {ratio:5.2f}x{flag}")
+
+    if failed:
+        print(f"FAIL: lean peak above {args.max_ratio:.2f}x of the default for {len(failed)} selection(s)")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# app/benchmarks/numeric_paths.py
+"""
+Time and peak memory of the numeric hot paths, on synthetic data of growing size.
+
+For every size (rows) two CSVs are generated with a fixed seed:
+  * a generic numeric file (numeric columns with blanks, plus a text column)
+    for dataana: read_csv_as_strings, extract_numeric_array,
+    read_numeric_csv, summarize_array and pca_via_covariance;
+  * a data.csv-shaped hourly file (City, Datetime, the 12 pollutants) for
+    HistoricalAnalyzer: load_df, clean_df and generate_city_analysis
+    (one city, plots included, no cache).
+
+Each case reports the best and median wall time over --repeat runs and the
+peak traced allocation (tracemalloc, in a separate run so tracing does not
+skew the times; it sees NumPy arrays and Python objects, not the C parser's
+internal buffers). Results are written as JSON together with the commit and
+library versions; --compare against an earlier JSON prints the ratios and
+fails on slowdowns above --threshold.
+
+Run from app/:
+    python benchmarks/numeric_paths.py --sizes 10000,100000,1000000 --json bench.json
+    python benchmarks/numeric_paths.py --json new.json --compare bench.json
+Sizes up to 10M rows work, but read_csv_as_strings then needs many GB of
+RAM; leave it out with --skip read_csv_as_strings.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+import dataana  # noqa: E402
+from Backend_core.historical_analyzer import HistoricalAnalyzer  # noqa: E402
+from Backend_core.ingest import POLLUTANTS  # noqa: E402
+
+CASES = [
+    "read_csv_as_strings", "extract_numeric_array", "read_numeric_csv", "summarize_array",
+    "pca_via_covariance", "HistoricalAnalyzer.load_df", "HistoricalAnalyzer.clean_df",
+    "HistoricalAnalyzer.generate_city_analysis",
+]
+
+WRITE_CHUNK = 500_000
+
+
+def write_numeric_csv(path, rows, cols=8, seed=0):
+    """Numeric columns (5% blank, 1% 'NA') and a text column, with a header."""
+    rng = np.random.default_rng(seed)
+    header = True
+    for start in range(0, rows, WRITE_CHUNK):
+        n = min(WRITE_CHUNK, rows - start)
+        data = rng.normal(50, 20, size=(n, cols))
+        frame = pd.DataFrame(data, columns=[f"c{j}" for j in range(cols)]).astype(object)
+        frame = frame.mask(rng.random((n, cols)) < 0.05, "").mask(rng.random((n, cols)) < 0.01, "NA")
+        frame["label"] = [f"site{i % 17}" for i in range(start, start + n)]
+        frame.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+
+def write_hourly_csv(path, rows, n_cities=20, seed=0):
+    """data.csv-shaped hourly rows: n_cities cities, each a contiguous hourly
+       history with seasonal and daily cycles, 5% missing values."""
+    rng = np.random.default_rng(seed)
+    per_city = -(-rows // n_cities)
+    header = True
+    for c in range(n_cities):
+        n_city = min(per_city, rows - c * per_city)
+        for start in range(0, max(n_city, 0), WRITE_CHUNK):
+            n = min(WRITE_CHUNK, n_city - start)
+            times = pd.Timestamp("2015-01-01") + pd.to_timedelta(np.arange(start, start + n), unit="h")
+            season = 1.0 + 0.5 * np.cos(2 * np.pi * (times.dayofyear.to_numpy() / 365.25))
+            daily = 1.0 + 0.3 * np.sin(2 * np.pi * times.hour.to_numpy() / 24.0)
+            base = rng.lognormal(3.0, 0.5, size=(n, len(POLLUTANTS))) * (season * daily)[:, None]
+            base[rng.random(base.shape) < 0.05] = np.nan
+            frame = pd.DataFrame(base.round(2), columns=POLLUTANTS)
+            frame.insert(0, "Datetime", times.strftime("%Y-%m-%d %H:%M:%S"))
+            frame.insert(0, "City", f"City{c:02d}")
+            frame.to_csv(path, mode="w" if header else "a", header=header, index=False)
+            header = False
+
+
+def measure(fn, repeat=3, trace=True):
+    """{'seconds_min', 'seconds_median', 'peak_mb'} of fn() (peak from one extra traced run)."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    peak = None
+    if trace:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return {"seconds_min": min(times), "seconds_median": statistics.median(times), "peak_mb": peak}
+
+
+def bench_size(rows, tmp, repeat, skip, trace, log=print):
+    results = []
+
+    def run(name, fn):
+        if name in skip:
+            return
+        r = measure(fn, repeat=repeat, trace=trace)
+        r.update(case=name, rows=rows)
+        results.append(r)
+        peak = "" if r["peak_mb"] is None else f"  peak {r['peak_mb']:9.1f} MiB"
+        log(f"  {name:<42} {r['seconds_min'] * 1000:10.1f} ms{peak}")
+
+    numeric_path = os.path.join(tmp, f"numeric_{rows}.csv")
+    hourly_path = os.path.join(tmp, f"hourly_{rows}.csv")
+    write_numeric_csv(numeric_path, rows)
+    write_hourly_csv(hourly_path, rows)
+
+    run("read_csv_as_strings", lambda: dataana.read_csv_as_strings(numeric_path))
+    arr, cols = dataana.read_numeric_csv(numeric_path)
+    if "extract_numeric_array" not in skip:
+        str_mat = dataana.transpose_pad(dataana.read_csv_as_strings(numeric_path))
+        run("extract_numeric_array", lambda: dataana.extract_numeric_array(str_mat, cols))
+        del str_mat
+    run("read_numeric_csv", lambda: dataana.read_numeric_csv(numeric_path))
+    run("summarize_array", lambda: dataana.summarize_array(arr))
+    normalized, _, _ = dataana.normalize_zero_mean_unit_var(dataana.impute_with_col_mean(arr))
+    run("pca_via_covariance", lambda: dataana.pca_via_covariance(normalized))
+    del arr, normalized
+
+    plots_dir = os.path.join(tmp, "plots")
+    run("HistoricalAnalyzer.load_df", lambda: HistoricalAnalyzer(hourly_path, plots_dir=plots_dir).load_df())
+    analyzer = HistoricalAnalyzer(hourly_path, plots_dir=plots_dir)
+    analyzer.load_df()
+
+    def clean():
+        analyzer._clean = None
+        analyzer.clean_df()
+
+    run("HistoricalAnalyzer.clean_df", clean)
+    analyzer.clean_df()
+    run("HistoricalAnalyzer.generate_city_analysis",
+        lambda: analyzer.generate_city_analysis("City00", use_cache=False))
+    os.remove(numeric_path)
+    os.remove(hourly_path)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=APP_DIR, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print new/old time ratios per (case, rows); returns the cases slower than threshold."""
+    old = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    slower = []
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'} (time ratio new/old, best of runs):")
+    for r in results:
+        ref = old.get((r["case"], r["rows"]))
+        if ref is None:
+            continue
+        ratio = r["seconds_min"] / ref["seconds_min"] if ref["seconds_min"] else float("inf")
+        mem = ""
+        if r.get("peak_mb") is not None and ref.get("peak_mb"):
+            mem = f"  memory {r['peak_mb'] / ref['peak_mb']:5.2f}x"
+        flag = "  SLOWER" if ratio > threshold else ""
+        print(f"  {r['case']:<42} {r['rows']:>10}  {ratio:5.2f}x{mem}{flag}")
+        if ratio > threshold:
+            slower.append(r)
+    return slower
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the dataana and HistoricalAnalyzer numeric paths.")
+    p.add_argument("--sizes", default="10000,100000,1000000",
+                   help="Comma-separated row counts of the synthetic CSVs (10k to 10M)")
+    p.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best and median are reported)")
+    p.add_argument("--skip", default="", help=f"Comma-separated cases to leave out, of: {', '.join(CASES)}")
+    p.add_argument("--no-memory", dest="memory", action="store_false", help="Do not measure peak memory")
+    p.add_argument("--json", default=None, help="Write the results to this JSON file")
+    p.add_argument("--compare", default=None, help="Earlier --json output to compare against")
+    p.add_argument("--threshold", type=float, default=1.25,
+                   help="With --compare, fail if a case got slower than this ratio")
+    args = p.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    skip = {s.strip() for s in args.skip.split(",") if s.strip()}
+    unknown = skip - set(CASES)
+    if unknown:
+        p.error(f"unknown cases in --skip: {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            print(f"{rows} rows")
+            results.extend(bench_size(rows, tmp, args.repeat, skip, args.memory))
+
+    report = {"meta": dict(environment(), sizes=sizes, repeat=args.repeat), "results": results}
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print("Wrote", args.json)
+    if args.compare:
+        with open(args.compare) as fh:
+            slower = compare(results, json.load(fh), args.threshold)
+        if slower:
+            print(f"FAIL: {len(slower)} case(s) slower than {args.threshold:.2f}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
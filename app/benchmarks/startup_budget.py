@@ -0,0 +1,98 @@
+# app/benchmarks/startup_budget.py
+"""
+Import-time budget check for the desktop app entry point (app/main.py).
+
+Imports `main` in fresh interpreters with `python -X importtime`, reports
+the median cumulative import time and the slowest top-level packages, and
+fails if the budget is exceeded or if the scientific stack (pandas,
+matplotlib, seaborn) is loaded before the historical view is opened.
+
+Run from app/:
+    python benchmarks/startup_budget.py --budget-ms 1000 --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+# modules that must only load on first historical use
+DEFERRED_MODULES = ['pandas', 'matplotlib', 'seaborn']
+
+PROBE = (
+    "import sys, json, main; "
+    "print(json.dumps([m for m in %r if m in sys.modules]))" % (DEFERRED_MODULES,)
+)
+
+
+def measure_once(module: str = "main"):
+    """Return (total_us, {top_level_package: cumulative_us}) for one cold import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip()[-2000:]}")
+
+    total = 0
+    packages = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        name = name.strip()
+        cumulative_us = int(cumulative_us)
+        if name == module:
+            total = cumulative_us
+        top = name.split(".")[0]
+        if top != module:
+            packages[top] = max(packages.get(top, 0), cumulative_us)
+    return total, packages
+
+
+def loaded_deferred_modules():
+    proc = subprocess.run([sys.executable, "-c", PROBE], cwd=APP_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"probe failed:\n{proc.stderr.strip()[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    p = argparse.ArgumentParser(description="Check app/main.py import time against a budget.")
+    p.add_argument("--budget-ms", type=float, default=1000.0, help="Maximum median import time of main, in ms")
+    p.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+    p.add_argument("--top", type=int, default=8, help="How many of the slowest packages to list")
+    args = p.parse_args()
+
+    totals = []
+    packages = {}
+    for _ in range(args.runs):
+        total, pkgs = measure_once()
+        totals.append(total)
+        for name, us in pkgs.items():
+            packages.setdefault(name, []).append(us)
+
+    median_ms = statistics.median(totals) / 1000.0
+    print(f"import main: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    slowest = sorted(((statistics.median(v) / 1000.0, k) for k, v in packages.items()), reverse=True)
+    for ms, name in slowest[:args.top]:
+        print(f"  {name:<24} {ms:8.1f} ms")
+
+    failed = False
+    leaked = loaded_deferred_modules()
+    if leaked:
+        print("FAIL: loaded at startup but should be deferred:", ", ".join(leaked))
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: over budget by {median_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,132 +1,77 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-#%%
-# Load station and hourly data
-stations_df = pd.read_csv('./Data/stations.csv')
-hourly_df = pd.read_csv('./Data/station_hour.csv')
-
-#%%
-# Preview data
-print(stations_df.head(20))
-print(hourly_df.head(10))
-
-#%%
-# Merge city information into hourly data
-merged_data = pd.merge(hourly_df, stations_df[['StationId', 'City']], on='StationId', how='left')
-print(merged_data.head(10))
-print('Merged data shape:', merged_data.shape)
-
-#%%
-# Extract datetime if not present
-if 'Datetime' not in merged_data.columns and 'Date' in merged_data.columns:
-    merged_data['Datetime'] = pd.to_datetime(merged_data['Date'])
-    if 'Hour' in merged_data.columns:
-        merged_data['Datetime'] += pd.to_timedelta(merged_data['Hour'], unit='h')
-
-# Identify numeric columns (excluding StationId)
-numeric_cols = merged_data.select_dtypes(include=['number']).columns.tolist()
-if 'StationId' in numeric_cols:
-    numeric_cols.remove('StationId')
-
-# Group by City and Datetime, calculate mean
-city_hourly_data = merged_data.groupby(['City', 'Datetime'])[numeric_cols].mean().reset_index()
-city_hourly_data['Datetime'] = pd.to_datetime(city_hourly_data['Datetime'])
-
-# Ensure complete time series for each city (hourly data for 5 years)
-cities = city_hourly_data['City'].unique()
-start_date = city_hourly_data['Datetime'].min()
-end_date = start_date + pd.DateOffset(years=5)
-complete_dates = pd.date_range(start=start_date, end=end_date, freq='H')
-
-# Create complete city-hour combinations
-total_combinations = [(city, date) for city in cities for date in complete_dates]
-complete_df = pd.DataFrame(total_combinations, columns=['City', 'Datetime'])
-
-# Merge with aggregated data
-complete_city_hourly = pd.merge(complete_df, city_hourly_data, on=['City', 'Datetime'], how='left')
-
-#%%
-# Preview processed data
-print(city_hourly_data.head())
-print('City-hourly data shape:', city_hourly_data.shape)
-
-#%%
-# Load main data for analysis
-df = pd.read_csv('./Data/data.csv')
-print(df.head())
-
-#%%
-# Convert datetime and extract features
-df['Datetime'] = pd.to_datetime(df['Datetime'])
-df['Year'] = df['Datetime'].dt.year
-df['Month'] = df['Datetime'].dt.month
-df['Hour'] = df['Datetime'].dt.hour
-
-# List of pollutants
-pollutants = [
-    'PM2.5', 'PM10', 'NO', 'NO2', 'NOx', 'NH3', 'CO', 'SO2',
-    'O3', 'Benzene', 'Toluene', 'Xylene'
-]
-
-#%%
-# User input for city
-city = input('Enter city name: ').strip()
-
-# Filter dataset for the selected city
-city_df = df[df['City'].str.lower() == city.lower()]
-
-if city_df.empty:
-    print(f'No data available for city: {city}')
-else:
+"""
+Builds the complete city-hourly dataset from station_hour.csv + stations.csv
+and optionally prints the historical analysis for one city.
+
+The heavy lifting lives in Backend_core.pipeline (incremental, checkpointed)
+and Backend_core.historical_analyzer, so this file is only a command line
+front end. Run from app/data_analysis/:
+
+    python analysis.py                      # refresh the city-hour table
+    python analysis.py --city Delhi         # ...and analyse one city
+    python analysis.py --full               # ignore checkpoints, rebuild
+"""
+import argparse
+import os
+import sys
+
+# Backend_core lives one level up (app/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Backend_core.pipeline import CityHourlyPipeline
+
+DATA_DIR = './Data'
+
+
+def build_city_hourly(data_dir=DATA_DIR, workdir=None, full=False, export=None):
+    """Run the ETL pipeline and return the complete city-hour DataFrame."""
+    pipeline = CityHourlyPipeline(
+        os.path.join(data_dir, 'station_hour.csv'),
+        os.path.join(data_dir, 'stations.csv'),
+        workdir or os.path.join(data_dir, 'pipeline'),
+    )
+    complete_city_hourly = pipeline.run(full=full)
+    if export:
+        pipeline.export_csv(export)
+    return complete_city_hourly
+
+
+def print_city_analysis(city, data_csv=os.path.join(DATA_DIR, 'data.csv'), plots_dir='./plots'):
+    """Print the same summary the original notebook did; plots are saved under plots_dir."""
+    from Backend_core.historical_analyzer import HistoricalAnalyzer
+
+    analysis = HistoricalAnalyzer(data_csv, plots_dir=plots_dir).generate_city_analysis(city)
+    if analysis is None:
+        print(f'No data available for city: {city}')
+        return None
+
     print(f'Analysis for city: {city}')
-    # Handle missing values
-    city_df = city_df.fillna(method='ffill')
-
-    # Yearly Trend
-    yearly = city_df.groupby('Year')[pollutants].mean()
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=yearly)
-    plt.title(f'Yearly Trend of Pollutants in {city}')
-    plt.ylabel('Average Concentration')
-    plt.show()
-
-    # Monthly Trend + Best/Worst Month
-    monthly = city_df.groupby('Month')[pollutants].mean()
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=monthly)
-    plt.title(f'Monthly Average Pollutants in {city}')
-    plt.show()
-
-    best_month = monthly.mean(axis=1).idxmin()
-    worst_month = monthly.mean(axis=1).idxmax()
-    print('✅ Best Month to Visit:', best_month)
-    print('❌ Worst Month to Visit:', worst_month)
-
-    # Hourly Pattern
-    hourly = city_df.groupby('Hour')[pollutants].mean()
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=hourly)
-    plt.title(f'Hourly Pollution Pattern in {city}')
-    plt.show()
-
-    # Most Toxic Pollutant
-    avg_pollutants = city_df[pollutants].mean().sort_values(ascending=False)
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x=avg_pollutants.index, y=avg_pollutants.values)
-    plt.xticks(rotation=45)
-    plt.title(f'Most Toxic Pollutants in {city} (5-Year Average)')
-    plt.show()
-    print('Most toxic pollutant overall:', avg_pollutants.index[0])
-
-    # Peak Month for Each Pollutant
-    peak_months = city_df.groupby('Month')[pollutants].mean().idxmax()
-    print('📌 Peak month for each pollutant:\n', peak_months)
-
-    # Correlation Heatmap
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(city_df[pollutants].corr(), annot=True, cmap='coolwarm')
-    plt.title(f'Correlation between Pollutants in {city}')
-    plt.show()
\ No newline at end of file
+    print('✅ Best Month to Visit:', analysis['best_month'])
+    print('❌ Worst Month to Visit:', analysis['worst_month'])
+    print('Most toxic pollutant overall:', analysis['most_toxic_overall'])
+    print('📌 Peak month for each pollutant:')
+    for p, m in analysis['peak_months'].items():
+        print(f'  {p}: {m}')
+    print('Plots saved to:', plots_dir)
+    return analysis
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Build city-hourly AQI data and analyse a city.")
+    p.add_argument('--data-dir', default=DATA_DIR, help='Directory with station_hour.csv, stations.csv and data.csv')
+    p.add_argument('--workdir', default=None, help='Checkpoint directory (default: <data-dir>/pipeline)')
+    p.add_argument('--full', action='store_true', help='Reprocess everything instead of only new rows')
+    p.add_argument('--export', default=None, help='Also write the city-hour table to this CSV')
+    p.add_argument('--skip-etl', action='store_true', help='Only run the city analysis')
+    p.add_argument('--city', default=None, help='City to analyse')
+    args = p.parse_args(argv)
+
+    if not args.skip_etl:
+        complete_city_hourly = build_city_hourly(args.data_dir, args.workdir, args.full, args.export)
+        print(complete_city_hourly.head())
+        print('City-hourly data shape:', complete_city_hourly.shape)
+
+    if args.city:
+        print_city_analysis(args.city.strip(), os.path.join(args.data_dir, 'data.csv'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,15 @@
+import csv
+import io
+import itertools
+import json
 import os
 import sys
+import time
+import tracemalloc
 import numpy as np
 import math
+from Backend_core.numeric import (RunningSummary, center_and_project, chunked_summary, impute_with_col_mean,
+                                  normalize_zero_mean_unit_var, pca_via_covariance, sorted_eig, summarize_array)
 
 def detect_delimiter(sample_line):
     for d in [",", "\t", ";", "|"]:
@@ -34,6 +42,171 @@ def transpose_pad(rows, pad_value=""):
             mat[i, j] = cell
     return mat
 
+def _clean_cell(cell):
+    return cell.strip().strip('"').strip("'")
+
+def _float_or_nan(cell):
+    try:
+        return float(cell)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _clean_float_or_nan(cell):
+    return _float_or_nan(_clean_cell(str(cell)))
+
+# common missing-value markers, mapped to "nan" up front so float() accepts them
+_NA_CELLS = {c: "nan" for c in ["", "NA", "N/A", "n/a", "na", "null", "NULL", "None", "-", "?"]}
+
+# columns at least this long are converted in bulk; shorter ones cell by cell
+_BULK_CELLS = 2048
+
+def parse_float_column(cells, dtype=float, strip_quotes=False, block=4096):
+    """float(cell) over a whole column of strings, straight into a float
+       array; cells that do not parse become NaN. strip_quotes applies the
+       same trimming as read_csv_as_strings first. Long columns are cast
+       block by block with an object -> float64 astype (the built-in float,
+       looped in C); a block that fails has its missing-value markers masked
+       and is cast again, and only blocks still holding unparseable text are
+       converted (and trimmed) cell by cell.
+    """
+    if len(cells) < _BULK_CELLS:
+        return _parse_float_cells(cells, dtype, strip_quotes, block)
+    cells = np.asarray(cells, dtype=object)
+    # a cell that parses as is holds no quotes, and float() ignores whitespace,
+    # so trimming only matters for the cells that fail
+    fallback = _clean_float_or_nan if strip_quotes else _float_or_nan
+    out = np.empty(len(cells), dtype=np.float64)
+    for start in range(0, len(cells), block):
+        part = cells[start:start + block]
+        dest = out[start:start + len(part)]
+        try:
+            dest[:] = part.astype(np.float64)
+            continue
+        except (TypeError, ValueError):
+            pass
+        missing = np.fromiter(map(_NA_CELLS.__contains__, part.tolist()), dtype=bool, count=len(part))
+        values = part[~missing]
+        try:
+            values = values.astype(np.float64)
+        except (TypeError, ValueError):
+            values = np.fromiter(map(fallback, values.tolist()), dtype=np.float64, count=len(values))
+        dest[missing] = np.nan
+        dest[~missing] = values
+    return out.astype(dtype, copy=False)
+
+def _parse_float_cells(cells, dtype=float, strip_quotes=False, block=4096):
+    """parse_float_column for short columns, through the built-in float per block."""
+    cells = cells.tolist() if isinstance(cells, np.ndarray) else list(cells)
+    if strip_quotes:
+        cells = [_clean_cell(str(c)) for c in cells]
+    cells = [_NA_CELLS.get(c, c) for c in cells]
+    out = np.empty(len(cells), dtype=np.float64)
+    for start in range(0, len(cells), block):
+        part = cells[start:start + block]
+        try:
+            out[start:start + len(part)] = np.fromiter(map(float, part), dtype=np.float64, count=len(part))
+        except (TypeError, ValueError):
+            out[start:start + len(part)] = np.fromiter(map(_float_or_nan, part), dtype=np.float64, count=len(part))
+    return out.astype(dtype, copy=False)
+
+def _read_sample(path, sample_rows=500):
+    """(delimiter, padded string matrix) of the first sample_rows lines."""
+    sample = []
+    with open(path, "r", errors="replace") as fh:
+        for ln in fh:
+            sample.append(ln.rstrip("\n\r"))
+            if len(sample) >= sample_rows:
+                break
+    if not sample:
+        return ",", transpose_pad([])
+    delim = detect_delimiter(sample[0])
+    rows = [[_clean_cell(cell) for cell in line.split(delim)] for line in sample]
+    return delim, transpose_pad(rows)
+
+def sniff_numeric_csv(path, sample_rows=500, min_numeric_fraction=0.6):
+    """Look at the first sample_rows lines only.
+       Returns (delimiter, numeric column indices), with the same rules as
+       read_csv_as_strings + detect_numeric_columns.
+    """
+    delim, str_mat = _read_sample(path, sample_rows)
+    return delim, detect_numeric_columns(str_mat, min_numeric_fraction=min_numeric_fraction)
+
+def _parse_split_lines(lines, delim, numeric_cols, dtype=float):
+    """Per-line str.split fallback of _parse_lines."""
+    rows = [ln.rstrip("\n\r").split(delim) for ln in lines]
+    block = np.empty((len(rows), len(numeric_cols)), dtype=dtype)
+    for idx, j in enumerate(numeric_cols):
+        cells = [r[j] if j < len(r) else "" for r in rows]
+        block[:, idx] = parse_float_column(cells, dtype=dtype, strip_quotes=True)
+    return block
+
+def _parse_lines(lines, delim, numeric_cols, dtype=float):
+    """Parse a block of raw lines into a (len(lines), len(numeric_cols)) float array
+       with pandas' C reader: only the numeric columns, no quoting, so lines
+       split exactly as str.split(delim) does. The block is handed over as
+       UTF-8 bytes, a quarter of the size of a StringIO buffer. Columns holding non-numeric
+       cells fall back to parse_float_column.
+    """
+    import pandas as pd
+    width = max(ln.count(delim) for ln in lines) + 1
+    present = [j for j in numeric_cols if j < width]
+    block = np.full((len(lines), len(numeric_cols)), np.nan, dtype=dtype)
+    if not present:
+        return block
+    frame = pd.read_csv(
+        io.BytesIO("".join(lines).encode("utf-8")), sep=delim, header=None, names=range(width), usecols=present,
+        skip_blank_lines=False, quoting=csv.QUOTE_NONE, float_precision="round_trip", low_memory=False
+    )
+    if len(frame) != len(lines):
+        return _parse_split_lines(lines, delim, numeric_cols, dtype)
+    for idx, j in enumerate(numeric_cols):
+        if j not in present:
+            continue
+        col = frame[j]
+        if col.dtype.kind in "fiu":
+            block[:, idx] = col.to_numpy(dtype=dtype, na_value=np.nan)
+        else:
+            block[:, idx] = parse_float_column(col.to_numpy(dtype=object), dtype=dtype, strip_quotes=True)
+    return block
+
+def iter_numeric_chunks(path, delim, numeric_cols, skip_rows=0, chunk_rows=20000, dtype=float):
+    """Yield float arrays of shape (<= chunk_rows, len(numeric_cols)), one per block of lines.
+       Rows shorter than a numeric column index give NaN for that column.
+    """
+    with open(path, "r", errors="replace") as fh:
+        for _ in itertools.islice(fh, skip_rows):
+            pass
+        while True:
+            lines = list(itertools.islice(fh, chunk_rows))
+            if not lines:
+                return
+            yield _parse_lines(lines, delim, numeric_cols, dtype=dtype)
+
+def read_numeric_csv(path, min_numeric_fraction=0.6, dtype=float, chunk_rows=20000, sample_rows=500):
+    """Streaming replacement for read_csv_as_strings + transpose_pad + extract_numeric_array.
+       The delimiter and numeric columns are sniffed from a sample, the lines
+       are counted, and only the numeric columns are parsed, chunk by chunk,
+       into one preallocated (nrows, n_numeric) array - no string matrix is
+       ever held. Returns (array, numeric column indices); every line is a
+       row, as before (so a header line becomes a row of NaN).
+    """
+    delim, str_mat = _read_sample(path, sample_rows)
+    numeric_cols = detect_numeric_columns(str_mat, min_numeric_fraction=min_numeric_fraction)
+    with open(path, "r", errors="replace") as fh:
+        nrows = sum(1 for _ in fh)
+    out = np.empty((nrows, len(numeric_cols)), dtype=dtype)
+    if not numeric_cols:
+        return out, numeric_cols
+    # the sampled lines (usually including a header) are already split
+    start = len(str_mat)
+    out[:start] = extract_numeric_array(str_mat, numeric_cols)
+    if start < nrows:
+        for block in iter_numeric_chunks(path, delim, numeric_cols, skip_rows=start,
+                                         chunk_rows=chunk_rows, dtype=dtype):
+            out[start:start + len(block)] = block
+            start += len(block)
+    return out[:start], numeric_cols
+
 def is_float_string(s):
     if s is None:
         return False
@@ -47,21 +220,58 @@ def is_float_string(s):
     except:
         return False
 
+def _count_float_strings(cells, max_failures=None, min_block=16):
+    """How many cells is_float_string accepts (a literal "nan" counts, as
+       float() parses it). Blocks go through the built-in float in one
+       pass; blocks holding text are bisected, so a header costs a few
+       small blocks rather than a cell-by-cell pass over the column.
+       Counting stops once more than max_failures cells were rejected
+       (the result is then only a lower bound).
+    """
+    count = failures = 0
+    pending = [(0, len(cells))]
+    while pending:
+        lo, hi = pending.pop()
+        part = cells[lo:hi]
+        try:
+            np.fromiter(map(float, part), dtype=np.float64, count=len(part))
+            count += len(part)
+            continue
+        except (TypeError, ValueError):
+            pass
+        if hi - lo > min_block:
+            mid = (lo + hi) // 2
+            pending += [(mid, hi), (lo, mid)]
+            continue
+        ok = sum(1 for c in part if is_float_string(str(c)))
+        count += ok
+        failures += len(part) - ok
+        if max_failures is not None and failures > max_failures:
+            break
+    return count
+
 def detect_numeric_columns(str_mat, min_numeric_fraction=0.6):
     """Return list of column indices which are sufficiently numeric."""
     if str_mat.size == 0:
         return []
     nrows, ncols = str_mat.shape
+    # sample up to first 500 rows to speed detection on large files
+    sample = str_mat[:min(nrows, 500)]
+    tested = len(sample)
+    # a column is out once more cells fail than the fraction allows
+    need = math.ceil(min_numeric_fraction * tested)
+    while need > 0 and (need - 1) / tested >= min_numeric_fraction:
+        need -= 1
+    max_failures = tested - need
     numeric_cols = []
     for j in range(ncols):
-        col = str_mat[:, j]
-        numeric_count = 0
-        tested = 0
-        # sample up to first 500 rows to speed detection on large files
-        for val in col[:min(nrows, 500)]:
-            tested += 1
-            if is_float_string(str(val)):
-                numeric_count += 1
+        cells = sample[:, j].tolist()
+        # missing-value markers parse once mapped to "nan" but are not numeric
+        mapped = list(map(_NA_CELLS.get, cells, cells))
+        markers = mapped.count("nan") - cells.count("nan")
+        if markers > max_failures:
+            continue
+        numeric_count = _count_float_strings(mapped, max_failures=max_failures - markers) - markers
         frac = numeric_count / max(1, tested)
         if frac >= min_numeric_fraction:
             numeric_cols.append(j)
@@ -72,142 +282,572 @@ def extract_numeric_array(str_mat, numeric_cols):
        Non-convertible cells are converted to np.nan.
     """
     nrows = str_mat.shape[0]
-    out = np.full((nrows, len(numeric_cols)), np.nan, dtype=float)
+    out = np.empty((nrows, len(numeric_cols)), dtype=float)
     for idx, j in enumerate(numeric_cols):
-        col = str_mat[:, j]
-        for i, cell in enumerate(col):
-            try:
-                val = float(cell)
-                out[i, idx] = val
-            except:
-                out[i, idx] = np.nan
+        out[:, idx] = parse_float_column(str_mat[:, j])
     return out
 
-def summarize_array(arr):
-    """Return summary dict for 2D float array."""
-    arr = np.asarray(arr, dtype=float)
-    nrows, ncols = arr.shape
-    total_nans = int(np.isnan(arr).sum())
-    per_col = []
-    for j in range(ncols):
-        col = arr[:, j]
-        nonan = col[~np.isnan(col)]
-        if nonan.size == 0:
-            per_col.append({"col": j, "count": 0, "mean": None, "std": None, "min": None, "max": None})
-        else:
-            per_col.append({
-                "col": j,
-                "count": int(nonan.size),
-                "mean": float(np.mean(nonan)),
-                "std": float(np.std(nonan, ddof=1)) if nonan.size > 1 else 0.0,
-                "min": float(np.min(nonan)),
-                "max": float(np.max(nonan))
-            })
-    return {"shape": (nrows, ncols), "total_nans": total_nans, "per_column": per_col}
-
-def impute_with_col_mean(arr):
-    arr = np.array(arr, dtype=float, copy=True)
-    for j in range(arr.shape[1]):
-        col = arr[:, j]
-        if np.all(np.isnan(col)):
-            arr[:, j] = 0.0
-            continue
-        mean = np.nanmean(col)
-        col[np.isnan(col)] = mean
-        arr[:, j] = col
-    return arr
-
-def normalize_zero_mean_unit_var(arr):
-    arr = np.array(arr, dtype=float, copy=True)
-    mean = np.mean(arr, axis=0)
-    std = np.std(arr, axis=0, ddof=1)
-    std_safe = np.where(std == 0, 1.0, std)
-    normalized = (arr - mean) / std_safe
-    return normalized, mean, std_safe
+def _iter_file_blocks(path, delim, str_mat, numeric_cols, chunk_rows=20000):
+    """Every row of path as numeric blocks, in file order: as in
+       read_numeric_csv, the sampled lines are already split, then the rest
+       of the file is parsed chunk by chunk.
+    """
+    yield extract_numeric_array(str_mat, numeric_cols)
+    yield from iter_numeric_chunks(path, delim, numeric_cols, skip_rows=len(str_mat), chunk_rows=chunk_rows)
 
-def pca_via_covariance(arr, n_components=None):
+def summarize_csv_streaming(path, min_numeric_fraction=0.6, chunk_rows=20000):
+    """summarize_array(read_numeric_csv(path)[0]) without holding the array:
+       chunks are parsed and folded into a RunningSummary one at a time.
+       Returns (summary dict, numeric column indices, RunningSummary).
     """
-    arr should be centered (or not; this function computes cov of arr).
-    returns (components, eigenvalues, projected_data)
-    components: columns are eigenvectors (shape = n_features x n_components)
+    delim, str_mat = _read_sample(path)
+    numeric_cols = detect_numeric_columns(str_mat, min_numeric_fraction=min_numeric_fraction)
+    stats = RunningSummary(len(numeric_cols))
+    if numeric_cols:
+        for block in _iter_file_blocks(path, delim, str_mat, numeric_cols, chunk_rows):
+            stats.update(block)
+    return stats.summary(), numeric_cols, stats
+
+class IncrementalPCA:
+    """Out-of-core PCA: partial_fit() accumulates the row count, column sums
+       and X^T X of each chunk (shifted by the first chunk's mean so the
+       sums stay small), which is all the covariance needs; memory is
+       O(n_features^2) whatever the number of rows. Accumulators built on
+       other chunks or files can be merge()d. components() gives the same
+       result as pca_via_covariance over all rows; transform() projects a
+       chunk.
+    """
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.shift = np.zeros(n_features)
+        self.sum = np.zeros(n_features)
+        self.gram = np.zeros((n_features, n_features))
+
+    def partial_fit(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        if len(chunk) == 0:
+            return self
+        if self.n == 0:
+            self.shift = chunk.mean(axis=0)
+        x = chunk - self.shift
+        self.n += len(chunk)
+        self.sum += x.sum(axis=0)
+        self.gram += x.T @ x
+        return self
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.shift = other.shift.copy()
+        # re-express other's sums around our shift: x - a = (x - b) + d
+        d = other.shift - self.shift
+        self.gram += other.gram + np.outer(other.sum, d) + np.outer(d, other.sum) + other.n * np.outer(d, d)
+        self.sum += other.sum + other.n * d
+        self.n += other.n
+        return self
+
+    @property
+    def mean(self):
+        return self.shift + self.sum / max(self.n, 1)
+
+    def covariance(self):
+        if self.n < 2:
+            raise ValueError("need at least 2 rows for a covariance")
+        m = self.sum / self.n
+        return (self.gram - self.n * np.outer(m, m)) / (self.n - 1)
+
+    def components(self, n_components=None):
+        """(components, eigenvalues) as returned by pca_via_covariance."""
+        return sorted_eig(self.covariance(), n_components)
+
+    def transform(self, chunk, components):
+        return center_and_project(np.asarray(chunk, dtype=float), self.mean, components)
+
+def pca_incremental(arr, n_components=None, chunk_rows=100000, project=True):
+    """pca_via_covariance computed with IncrementalPCA over row blocks of arr,
+       so no n_rows-sized temporaries are made besides the projection
+       (which is None with project=False). arr must fit in memory; for
+       files larger than RAM see pca_csv_streaming.
     """
     arr = np.asarray(arr, dtype=float)
-    cov = np.cov(arr, rowvar=False)
-    eigvals, eigvecs = np.linalg.eigh(cov)  # symmetric
-    idx = np.argsort(eigvals)[::-1]
-    eigvals = eigvals[idx]
-    eigvecs = eigvecs[:, idx]
-    if n_components is not None:
-        eigvals = eigvals[:n_components]
-        eigvecs = eigvecs[:, :n_components]
-    projected = np.dot(arr - np.mean(arr, axis=0), eigvecs)
+    ipca = IncrementalPCA(arr.shape[1])
+    for start in range(0, arr.shape[0], chunk_rows):
+        ipca.partial_fit(arr[start:start + chunk_rows])
+    eigvecs, eigvals = ipca.components(n_components)
+    projected = center_and_project(arr, ipca.mean, eigvecs, chunk_rows=chunk_rows) if project else None
     return eigvecs, eigvals, projected
 
-def analyze_csv_file(path, outdir=None, min_numeric_fraction=0.6, save_npy=True, n_pca_components=None):
-    rows = read_csv_as_strings(path)
-    if len(rows) == 0:
-        raise ValueError("Empty file: " + path)
-    str_mat = transpose_pad(rows)
+def pca_csv_streaming(path, n_components=None, min_numeric_fraction=0.6, chunk_rows=20000, project=True):
+    """The mean imputation, standardization and PCA of analyze_csv_file
+       without ever holding the data, for files larger than RAM. Pass 1
+       gathers the column means and stds in a RunningSummary; pass 2
+       imputes and standardizes each chunk and feeds it to IncrementalPCA;
+       pass 3 projects chunk by chunk into an (n_rows, n_components) array
+       (skipped with project=False, giving None). Memory is bounded by
+       chunk_rows plus that projection. Returns (summary dict, numeric
+       column indices, components, eigenvalues, projected).
+    """
+    delim, str_mat = _read_sample(path)
     numeric_cols = detect_numeric_columns(str_mat, min_numeric_fraction=min_numeric_fraction)
-    if len(numeric_cols) == 0:
-        raise ValueError("No numeric columns detected in file: " + path)
-    numeric_arr = extract_numeric_array(str_mat, numeric_cols)
-    summary = summarize_array(numeric_arr)
-    imputed = impute_with_col_mean(numeric_arr)
-    normalized, mean, std = normalize_zero_mean_unit_var(imputed)
-    comps, vals, proj = pca_via_covariance(normalized, n_components=n_pca_components)
+    stats = RunningSummary(len(numeric_cols))
+    if not numeric_cols:
+        return stats.summary(), numeric_cols, None, None, None
+    for block in _iter_file_blocks(path, delim, str_mat, numeric_cols, chunk_rows):
+        stats.update(block)
+
+    # imputing with the column mean leaves the mean and M2 unchanged, so the
+    # imputed column's std is sqrt(M2 / (n_rows - 1)); all-NaN columns have
+    # mean 0 in a RunningSummary, matching impute_with_col_mean's 0.0
+    mean = stats.mean
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(stats.m2 / (stats.nrows - 1))
+    std_safe = np.where(std == 0, 1.0, std)
+
+    def standardized(block):
+        np.copyto(block, mean, where=np.isnan(block))
+        block -= mean
+        block /= std_safe
+        return block
+
+    ipca = IncrementalPCA(len(numeric_cols))
+    for block in _iter_file_blocks(path, delim, str_mat, numeric_cols, chunk_rows):
+        ipca.partial_fit(standardized(block))
+    eigvecs, eigvals = ipca.components(n_components)
+    projected = None
+    if project:
+        projected = np.empty((stats.nrows, eigvecs.shape[1]))
+        start = 0
+        for block in _iter_file_blocks(path, delim, str_mat, numeric_cols, chunk_rows):
+            center_and_project(standardized(block), ipca.mean, eigvecs, out=projected[start:start + len(block)])
+            start += len(block)
+    return stats.summary(), numeric_cols, eigvecs, eigvals, projected
+
+def pca_randomized(arr, n_components, n_oversamples=10, n_iter=4, seed=0):
+    """Top n_components of the PCA by randomized truncated SVD (Halko et
+       al.): the centered data is multiplied by a random
+       (n_features x n_components + n_oversamples) matrix, refined with
+       n_iter power iterations, and only that small subspace is decomposed.
+       Costs O(n_rows * n_features * k) instead of a full covariance and
+       eigh. Returns (components, eigenvalues, projected) like
+       pca_via_covariance.
+    """
+    arr = np.asarray(arr, dtype=float)
+    nrows, ncols = arr.shape
+    if not n_components or n_components < 1:
+        raise ValueError("randomized PCA needs n_components >= 1")
+    k = min(n_components, ncols, nrows)
+    width = min(k + n_oversamples, ncols, nrows)
+    mean = arr.mean(axis=0)
+    ones = np.ones(nrows)
+
+    # products with the centered matrix (arr - mean) without forming it
+    def centered_dot(m):
+        return arr @ m - np.outer(ones, mean @ m)
+
+    def centered_tdot(q):
+        return arr.T @ q - np.outer(mean, q.sum(axis=0))
+
+    # power iterations, re-orthonormalized in the small (n_features x width)
+    # space; only the final basis of the row space needs a tall QR
+    z = np.random.default_rng(seed).standard_normal((ncols, width))
+    for _ in range(n_iter):
+        z, _ = np.linalg.qr(centered_tdot(centered_dot(z)))
+    q, _ = np.linalg.qr(centered_dot(z))
+    b = centered_tdot(q).T
+    u, sing, vt = np.linalg.svd(b, full_matrices=False)
+    components = vt[:k].T
+    eigvals = sing[:k] ** 2 / max(nrows - 1, 1)
+    projected = (q @ u[:, :k]) * sing[:k]
+    return components, eigvals, projected
 
+PCA_METHODS = {
+    "covariance": pca_via_covariance,
+    "incremental": pca_incremental,
+    "randomized": pca_randomized,
+}
+
+def run_pca(arr, n_components=None, method="covariance"):
+    """Dispatch to one of PCA_METHODS; all return (components, eigenvalues, projected)."""
+    try:
+        fn = PCA_METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown PCA method {method!r}; expected one of {list(PCA_METHODS)}") from None
+    if method == "randomized" and n_components is None:
+        raise ValueError("the randomized PCA method requires --pca-components")
+    return fn(arr, n_components=n_components)
+
+# arrays analyze_csv_file can return / save besides the numeric column indices
+OUTPUTS = ("imputed", "normalized", "pca_components", "pca_eigenvalues", "projected")
+
+# npy: one <base>__<name>.npy per array; bundle: a single uncompressed,
+# memory-mappable <base>__outputs.npb; npz: a compressed <base>__outputs.npz
+OUTPUT_FORMATS = ("npy", "bundle", "npz")
+
+# bundle layout: magic, little-endian uint64 length of a JSON index, the
+# index, padding, then each array's raw C-order bytes at a 64-byte aligned
+# offset (relative to the end of the padded header) recorded in the index
+BUNDLE_MAGIC = b"\x93NPBNDL1"
+BUNDLE_ALIGN = 64
+
+def _storage_dtype(arr, float32):
+    return np.dtype(np.float32) if float32 and arr.dtype.kind == "f" else arr.dtype
+
+def _row_blocks(arr, dtype, rows=65536):
+    """arr (as dtype) in C-order row blocks, so casting never copies the whole array."""
+    if arr.ndim == 0:
+        yield np.ascontiguousarray(arr, dtype=dtype)
+        return
+    for start in range(0, max(len(arr), 1), rows):
+        yield np.ascontiguousarray(arr[start:start + rows], dtype=dtype)
+
+def write_bundle(path, arrays, float32=False):
+    """Write {name: array} as one bundle file (see BUNDLE_MAGIC) that
+       read_bundle can memory-map array by array.
+    """
+    arrays = {k: np.asarray(v) for k, v in arrays.items()}
+    index, offset = {}, 0
+    for name, arr in arrays.items():
+        dtype = _storage_dtype(arr, float32)
+        index[name] = {"dtype": dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += -(-arr.size * dtype.itemsize // BUNDLE_ALIGN) * BUNDLE_ALIGN
+    header = json.dumps({"version": 1, "arrays": index}).encode("utf-8")
+    start = len(BUNDLE_MAGIC) + 8 + len(header)
+    padding = -start % BUNDLE_ALIGN
+    with open(path, "wb") as fh:
+        fh.write(BUNDLE_MAGIC)
+        fh.write(np.array(len(header) + padding, dtype="<u8").tobytes())
+        fh.write(header + b" " * padding)
+        base = fh.tell()
+        for name, arr in arrays.items():
+            fh.seek(base + index[name]["offset"])
+            for block in _row_blocks(arr, np.dtype(index[name]["dtype"])):
+                if block.size:
+                    fh.write(block.data)
+        fh.truncate(base + offset)
+
+def read_bundle(path, mmap_mode="r", names=None):
+    """{name: array} from a write_bundle file. With mmap_mode (as for
+       np.load) the arrays are np.memmap views and nothing is read until
+       used; mmap_mode=None reads them into memory. names limits the arrays.
+    """
+    with open(path, "rb") as fh:
+        if fh.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+            raise ValueError(f"Not an array bundle: {path}")
+        header_len = int(np.frombuffer(fh.read(8), dtype="<u8")[0])
+        index = json.loads(fh.read(header_len).decode("utf-8"))["arrays"]
+        base = len(BUNDLE_MAGIC) + 8 + header_len
+        out = {}
+        for name, entry in index.items():
+            if names is not None and name not in names:
+                continue
+            dtype, shape = np.dtype(entry["dtype"]), tuple(entry["shape"])
+            count = int(np.prod(shape))
+            if mmap_mode and count:
+                out[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=base + entry["offset"], shape=shape)
+            else:
+                fh.seek(base + entry["offset"])
+                out[name] = np.fromfile(fh, dtype=dtype, count=count).reshape(shape)
+    return out
+
+def save_outputs(outdir, base, arrays, fmt="npy", float32=False):
+    """Save {name: array} for one input in OUTPUT_FORMATS; float32=True stores float arrays as float32.
+       Returns the paths written.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {fmt!r}; expected one of {list(OUTPUT_FORMATS)}")
+    os.makedirs(outdir, exist_ok=True)
+    if fmt == "bundle":
+        path = os.path.join(outdir, f"{base}__outputs.npb")
+        write_bundle(path, arrays, float32=float32)
+        return [path]
+    if fmt == "npz":
+        path = os.path.join(outdir, f"{base}__outputs.npz")
+        np.savez_compressed(path, **{k: np.asarray(v).astype(_storage_dtype(np.asarray(v), float32), copy=False)
+                                     for k, v in arrays.items()})
+        return [path]
+    paths = []
+    for name, arr in arrays.items():
+        arr = np.asarray(arr)
+        path = os.path.join(outdir, f"{base}__{name}.npy")
+        dtype = _storage_dtype(arr, float32)
+        if dtype == arr.dtype:
+            np.save(path, arr)
+        else:
+            # cast block by block straight into the file
+            mm = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=arr.shape)
+            pos = 0
+            for block in _row_blocks(arr, dtype):
+                mm[pos:pos + len(block)] = block
+                pos += len(block)
+            mm.flush()
+            del mm
+        paths.append(path)
+    return paths
+
+def load_outputs(outdir, base, mmap_mode="r", names=None):
+    """{name: array} saved by analyze_csv_file for input `base`, in whichever
+       format was used. npy and bundle arrays are memory-mapped with
+       mmap_mode (None reads them fully); npz members are compressed and are
+       read (only those in names, if given) into memory.
+    """
+    bundle = os.path.join(outdir, f"{base}__outputs.npb")
+    if os.path.exists(bundle):
+        return read_bundle(bundle, mmap_mode=mmap_mode, names=names)
+    npz = os.path.join(outdir, f"{base}__outputs.npz")
+    if os.path.exists(npz):
+        with np.load(npz) as data:
+            return {k: data[k] for k in data.files if names is None or k in names}
+    out = {}
+    for name in ("numeric_cols_indices",) + OUTPUTS:
+        path = os.path.join(outdir, f"{base}__{name}.npy")
+        if (names is None or name in names) and os.path.exists(path):
+            out[name] = np.load(path, mmap_mode=mmap_mode)
+    if not out:
+        raise FileNotFoundError(f"No saved outputs for {base!r} in {outdir}")
+    return out
+
+def _save_analysis(path, out, outdir, output_format="npy", float32=False):
+    """save_outputs of an analyze_csv_file result, named after the input file."""
     base = os.path.splitext(os.path.basename(path))[0]
-    out = {
-        "summary": summary,
-        "numeric_cols_indices": numeric_cols,
-        "imputed": imputed,
-        "normalized": normalized,
-        "pca_components": comps,
-        "pca_eigenvalues": vals,
-        "projected": proj
-    }
-
-    if outdir and save_npy:
-        os.makedirs(outdir, exist_ok=True)
-        np.save(os.path.join(outdir, f"{base}__numeric_cols_indices.npy"), np.array(numeric_cols))
-        np.save(os.path.join(outdir, f"{base}__imputed.npy"), imputed)
-        np.save(os.path.join(outdir, f"{base}__normalized.npy"), normalized)
-        np.save(os.path.join(outdir, f"{base}__pca_components.npy"), comps)
-        np.save(os.path.join(outdir, f"{base}__pca_eigenvalues.npy"), vals)
-        np.save(os.path.join(outdir, f"{base}__projected.npy"), proj)
+    arrays = {"numeric_cols_indices": np.array(out["numeric_cols_indices"])}
+    arrays.update((k, out[k]) for k in OUTPUTS if k in out)
+    save_outputs(outdir, base, arrays, fmt=output_format, float32=float32)
+
+def analyze_csv_file(path, outdir=None, min_numeric_fraction=0.6, save_npy=True, n_pca_components=None,
+                     pca_method="covariance", outputs=None, lean=False, chunk_rows=20000,
+                     report_memory=False, output_format="npy", float32=False):
+    """Summary, mean imputation, standardization and PCA of the numeric
+       columns of one CSV. outputs limits the arrays returned and saved
+       (default: all of OUTPUTS). lean=True keeps a single data-sized array:
+       the summary and column statistics are computed over chunk_rows
+       blocks, imputation (with the summary's means) and standardization
+       happen in place by blocks, the covariance is accumulated and the
+       projection computed by blocks, and the projection is skipped unless
+       asked for. report_memory=True
+       adds the peak traced allocation ("peak_memory_mb") to the summary;
+       tracing slows parsing down, so it is off by default. Saved arrays go
+       to outdir in output_format (see save_outputs / load_outputs).
+    """
+    outputs = OUTPUTS if outputs is None else tuple(outputs)
+    unknown = set(outputs) - set(OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown outputs {sorted(unknown)}; expected some of {list(OUTPUTS)}")
+    started_tracing = report_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif report_memory:
+        tracemalloc.reset_peak()
+    try:
+        if os.path.getsize(path) == 0:
+            raise ValueError(f"Empty file: {path}")
+        numeric_arr, numeric_cols = read_numeric_csv(path, min_numeric_fraction=min_numeric_fraction,
+                                                     chunk_rows=chunk_rows)
+        if len(numeric_cols) == 0:
+            raise ValueError(f"No numeric columns detected in file: {path}")
+        # numeric_arr is not returned, so fill it rather than a copy
+        if lean:
+            stats = chunked_summary(numeric_arr, chunk_rows)
+            summary = stats.summary()
+            imputed = impute_with_col_mean(numeric_arr, inplace=True, means=stats.mean, chunk_rows=chunk_rows)
+        else:
+            summary = summarize_array(numeric_arr)
+            imputed = impute_with_col_mean(numeric_arr, inplace=True)
+        del numeric_arr
+        out = {"summary": summary, "numeric_cols_indices": numeric_cols}
+        if "imputed" in outputs:
+            out["imputed"] = imputed
+        wants_pca = any(k in outputs for k in ("pca_components", "pca_eigenvalues", "projected"))
+        if "normalized" in outputs or wants_pca:
+            if lean:
+                # standardize in place unless the imputed values are wanted too
+                normalized, mean, std = normalize_zero_mean_unit_var(
+                    imputed, inplace="imputed" not in outputs, chunk_rows=chunk_rows)
+            else:
+                normalized, mean, std = normalize_zero_mean_unit_var(imputed)
+            del imputed
+            if "normalized" in outputs:
+                out["normalized"] = normalized
+            if wants_pca:
+                if lean and pca_method in ("covariance", "incremental"):
+                    comps, vals, proj = pca_incremental(normalized, n_components=n_pca_components,
+                                                        chunk_rows=chunk_rows, project="projected" in outputs)
+                else:
+                    comps, vals, proj = run_pca(normalized, n_components=n_pca_components, method=pca_method)
+                out.update(pca_components=comps, pca_eigenvalues=vals, projected=proj)
+                for k in ("pca_components", "pca_eigenvalues", "projected"):
+                    if k not in outputs:
+                        del out[k]
+            del normalized
 
+        if outdir and save_npy:
+            _save_analysis(path, out, outdir, output_format, float32)
+
+        if report_memory:
+            summary["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
     return out
 
+def _analyze_stream(path, kwargs):
+    """--stream analysis of one file: the summary and, when n_pca_components
+       is given and a PCA output is asked for, pca_csv_streaming's PCA
+       (saved like analyze_csv_file's). imputed and normalized are data-sized
+       and never produced here.
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError(f"Empty file: {path}")
+    min_numeric_fraction = kwargs.get("min_numeric_fraction", 0.6)
+    chunk_rows = kwargs.get("chunk_rows", 20000)
+    outputs = kwargs.get("outputs") or OUTPUTS
+    n_components = kwargs.get("n_pca_components")
+    pca_outputs = [k for k in ("pca_components", "pca_eigenvalues", "projected") if k in outputs]
+    if n_components is None or not pca_outputs:
+        summary, numeric_cols, _ = summarize_csv_streaming(path, min_numeric_fraction, chunk_rows)
+        if len(numeric_cols) == 0:
+            raise ValueError(f"No numeric columns detected in file: {path}")
+        return {"summary": summary, "numeric_cols_indices": numeric_cols}
+
+    summary, numeric_cols, comps, vals, proj = pca_csv_streaming(
+        path, n_components, min_numeric_fraction, chunk_rows, project="projected" in outputs)
+    if len(numeric_cols) == 0:
+        raise ValueError(f"No numeric columns detected in file: {path}")
+    out = {"summary": summary, "numeric_cols_indices": numeric_cols}
+    arrays = {"pca_components": comps, "pca_eigenvalues": vals, "projected": proj}
+    out.update((k, arrays[k]) for k in pca_outputs)
+    if kwargs.get("outdir") and kwargs.get("save_npy", True):
+        _save_analysis(path, out, kwargs["outdir"], kwargs.get("output_format", "npy"),
+                       kwargs.get("float32", False))
+    return out
+
+def _analyze_one(path, stream, kwargs, keep_arrays=True):
+    """analyze_csv_file (or the --stream analysis) of one file; returns
+       (out, error message or None, seconds). keep_arrays=False returns only
+       the summary and column indices, which is all a worker process needs
+       to send back (arrays are saved by the worker).
+    """
+    started = time.perf_counter()
+    try:
+        out = _analyze_stream(path, kwargs) if stream else analyze_csv_file(path, **kwargs)
+        if not keep_arrays:
+            out = {"summary": out["summary"], "numeric_cols_indices": out["numeric_cols_indices"]}
+        return out, None, time.perf_counter() - started
+    except Exception as e:
+        return None, str(e) or type(e).__name__, time.perf_counter() - started
+
+def analyze_files(files, jobs=1, stream=False, **kwargs):
+    """Analyze several files, yielding (path, out, error, seconds) as each
+       finishes; error is None on success, else the message (a failing file
+       does not stop the others). jobs > 1 runs the files in a process pool
+       and yields them in completion order, with out holding only the
+       summary and numeric column indices.
+    """
+    if jobs is None or jobs <= 1 or len(files) <= 1:
+        for path in files:
+            yield (path,) + _analyze_one(path, stream, kwargs)
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as pool:
+        futures = {pool.submit(_analyze_one, path, stream, kwargs, False): path for path in files}
+        for fut in as_completed(futures):
+            try:
+                yield (futures[fut],) + fut.result()
+            except Exception as e:
+                # the worker itself died (e.g. killed for running out of memory)
+                yield futures[fut], None, str(e) or type(e).__name__, 0.0
+
+def aggregate_summaries(summaries):
+    """Merge (path, summarize_array dict) pairs of several files (numeric
+       columns matched by position) into one. Returns (summary, paths
+       merged); only the files with the most common number of numeric
+       columns are merged.
+    """
+    summaries = list(summaries)
+    if not summaries:
+        return None, []
+    widths = [len(summary["per_column"]) for _, summary in summaries]
+    ncols = max(widths, key=widths.count)
+    total = RunningSummary(ncols)
+    merged = []
+    for path, summary in summaries:
+        if len(summary["per_column"]) == ncols:
+            total.merge(RunningSummary.from_summary(summary))
+            merged.append(path)
+    return total.summary(), merged
+
 def print_summary(out):
     s = out["summary"]
     print("Shape:", s["shape"])
     print("Total NaNs:", s["total_nans"])
     for c in s["per_column"]:
         print(" Col", c["col"], "count=", c["count"], "mean=", c["mean"], "std=", c["std"], "min=", c["min"], "max=", c["max"])
+    if "peak_memory_mb" in s:
+        print("Peak memory: %.1f MiB" % s["peak_memory_mb"])
 
 def main():
     import argparse
     p = argparse.ArgumentParser(description="Numpy CSV analyzer (numeric columns only).")
     p.add_argument("files", nargs="+", help="CSV file(s) to analyze")
-    p.add_argument("--outdir", default="./numpy_analysis_out", help="Directory to save .npy outputs")
+    p.add_argument("--outdir", default="./numpy_analysis_out", help="Directory to save numpy outputs")
     p.add_argument("--min_numeric_fraction", type=float, default=0.6,
                    help="Fraction of sampled cells in a column that must parse as float to consider the column numeric.")
-    p.add_argument("--no-save", dest="save", action="store_false", help="Do not save .npy outputs")
+    p.add_argument("--no-save", dest="save", action="store_false", help="Do not save numpy outputs")
+    p.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="npy",
+                   help="npy: one .npy per array; bundle: one memory-mappable .npb per input; "
+                        "npz: one compressed .npz per input")
+    p.add_argument("--float32", action="store_true", help="Store float arrays as float32")
     p.add_argument("--pca-components", type=int, default=None, help="Number of PCA components to keep")
+    p.add_argument("--pca-method", choices=list(PCA_METHODS), default="covariance",
+                   help="covariance: full eigh; incremental: X^T X accumulated over row chunks; "
+                        "randomized: truncated SVD of the top --pca-components only")
+    p.add_argument("--stream", action="store_true",
+                   help="Read the file in chunks, never holding it (for files larger than RAM): the summary, plus "
+                        "an incremental PCA of the standardized columns when --pca-components is given "
+                        "(imputed and normalized are not produced)")
+    p.add_argument("--chunk-rows", type=int, default=20000, help="Rows per chunk in --stream and --lean modes")
+    p.add_argument("--lean", action="store_true",
+                   help="Low-memory mode: impute/standardize in place, chunked statistics, covariance and projection")
+    p.add_argument("--outputs", default=",".join(OUTPUTS),
+                   help="Comma-separated arrays to keep and save (default: all of %s)" % ",".join(OUTPUTS))
+    p.add_argument("--report-memory", action="store_true", help="Report peak memory (traced; slows parsing)")
+    p.add_argument("--jobs", type=int, default=1,
+                   help="Analyze this many files in parallel worker processes (results print as they finish)")
+    p.add_argument("--aggregate", action="store_true",
+                   help="Also print one summary merged over all files (numeric columns matched by position)")
     args = p.parse_args()
 
-    for f in args.files:
-        try:
-            print("\nAnalyzing:", f)
-            out = analyze_csv_file(f, outdir=args.outdir, min_numeric_fraction=args.min_numeric_fraction,
-                                   save_npy=args.save, n_pca_components=args.pca_components)
-            print_summary(out)
-            print("Detected numeric columns indices (0-based):", out["numeric_cols_indices"])
-            if args.save:
-                print("Saved numpy outputs to:", args.outdir)
-        except Exception as e:
-            print("Error analyzing", f, ":", str(e))
-
-if _name_ == "_main_":
+    kwargs = dict(outdir=args.outdir, min_numeric_fraction=args.min_numeric_fraction, save_npy=args.save,
+                  n_pca_components=args.pca_components, pca_method=args.pca_method, lean=args.lean,
+                  chunk_rows=args.chunk_rows, report_memory=args.report_memory,
+                  output_format=args.output_format, float32=args.float32,
+                  outputs=[o.strip() for o in args.outputs.split(",") if o.strip()])
+    # --stream only has arrays to save when it runs the PCA
+    saves = args.save and (not args.stream or (
+        args.pca_components is not None
+        and any(k in kwargs["outputs"] for k in ("pca_components", "pca_eigenvalues", "projected"))))
+    summaries = []
+    results = analyze_files(args.files, jobs=args.jobs, stream=args.stream, **kwargs)
+    for done, (f, out, error, seconds) in enumerate(results, 1):
+        print(f"\nAnalyzed [{done}/{len(args.files)}]: {f} ({seconds:.1f}s)")
+        if error is not None:
+            print("Error analyzing", f, ":", error)
+            continue
+        print_summary(out)
+        print("Detected numeric columns indices (0-based):", out["numeric_cols_indices"])
+        if saves:
+            print("Saved numpy outputs to:", args.outdir)
+        summaries.append((f, out["summary"]))
+
+    if args.aggregate:
+        summary, merged = aggregate_summaries(summaries)
+        print(f"\nAggregate over {len(merged)} of {len(args.files)} files:")
+        if summary is not None:
+            print_summary({"summary": summary})
+        skipped = [f for f, _ in summaries if f not in merged]
+        if skipped:
+            print("Not merged (different number of numeric columns):", ", ".join(skipped))
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
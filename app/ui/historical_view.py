@@ -1,14 +1,16 @@
 # app/ui/historical_view.py
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import seaborn as sns
 import flet as ft
 from pathlib import Path
-from Backend_core.historical_analyzer import HistoricalAnalyzer
 
 ASSETS_PLOTS_DIR = Path("assets") / "plots"
 
+# one line colour per pollutant (same order as HistoricalAnalyzer.pollutants)
+SERIES_COLORS = [
+    ft.Colors.RED_400, ft.Colors.ORANGE_400, ft.Colors.AMBER_400, ft.Colors.YELLOW_400,
+    ft.Colors.LIME_400, ft.Colors.GREEN_400, ft.Colors.TEAL_400, ft.Colors.CYAN_400,
+    ft.Colors.BLUE_400, ft.Colors.INDIGO_400, ft.Colors.PURPLE_400, ft.Colors.PINK_400,
+]
+
 class HistoricalView(ft.View):
     def __init__(self, page: ft.Page):
         super().__init__(route="/historical")
@@ -18,13 +20,23 @@ class HistoricalView(ft.View):
         if not hasattr(page, 'assets_dir') or page.assets_dir is None:
             page.assets_dir = "assets"
 
+        # Imported here so pandas (and matplotlib, on the first PNG plot) only
+        # load once the historical route is opened.
+        from Backend_core.historical_analyzer import HistoricalAnalyzer
+
         # Instantiate analyzer with the CSV path relative to app/
         # Adjust the csv path if your data lives elsewhere.
-        self.analyzer = HistoricalAnalyzer(csv_filepath="data_analysis/Data/data.csv")
+        # Results precomputed by `python -m Backend_core.precompute` are served from cache_dir.
+        self.analyzer = HistoricalAnalyzer(
+            csv_filepath="data_analysis/Data/data.csv",
+            cache_dir="data_analysis/Data/precomputed"
+        )
 
         # UI components
         self.city_input = ft.TextField(label="City", hint_text="Enter city name", expand=True)
         self.analyze_btn = ft.ElevatedButton("Analyze", on_click=self.run_analysis)
+        # native charts skip matplotlib entirely; PNG mode keeps the original plots
+        self.native_switch = ft.Switch(label="Native charts", value=True)
         self.results = ft.Column([], spacing=16, scroll=ft.ScrollMode.AUTO)
         self.snackbar = ft.SnackBar(content=ft.Text(""))
 
@@ -39,7 +51,7 @@ class HistoricalView(ft.View):
             padding=12
         )
 
-        search_row = ft.Row([self.city_input, self.analyze_btn], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+        search_row = ft.Row([self.city_input, self.native_switch, self.analyze_btn], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
 
         self.controls.append(
             ft.Column([
@@ -62,8 +74,12 @@ class HistoricalView(ft.View):
         self.results.controls.clear()
         self.page.update()
 
+        native = bool(self.native_switch.value)
         try:
-            analysis = self.analyzer.generate_city_analysis(city)
+            if native:
+                analysis = self.analyzer.generate_city_series(city)
+            else:
+                analysis = self.analyzer.generate_city_analysis(city)
         except FileNotFoundError as ex:
             self.page.snack_bar = ft.SnackBar(ft.Text(str(ex)))
             self.page.snack_bar.open = True
@@ -93,7 +109,42 @@ class HistoricalView(ft.View):
             ], spacing=12)
         )
 
-        # Show plots if present; the analyzer saved them under assets/plots and returned paths like 'plots/xxx.png'
+        if native:
+            tabs = self._chart_tabs(analysis)
+        else:
+            tabs = self._image_tabs(analysis)
+
+        if tabs:
+            self.results.controls.append(
+                ft.Container(
+                    content=ft.Tabs(
+                        tabs=tabs,
+                        selected_index=0,
+                        expand=False
+                    ),
+                    height=600
+                )
+            )
+
+        # Show peak months table
+        peak = analysis.get('peak_months', {})
+        if peak:
+            rows = []
+            for p, m in peak.items():
+                rows.append(ft.Row([ft.Text(p), ft.Text(str(m))], alignment=ft.MainAxisAlignment.SPACE_BETWEEN))
+            self.results.controls.append(ft.Card(content=ft.Column([ft.Text("Peak month per pollutant"), ft.Divider()] + rows), elevation=1))
+
+        # Show average pollutant values
+        avg = analysis.get('avg_pollutants', {})
+        if avg:
+            avg_rows = [ft.Row([ft.Text(k), ft.Text(f"{v:.2f}")], alignment=ft.MainAxisAlignment.SPACE_BETWEEN) for k, v in avg.items()]
+            self.results.controls.append(ft.Card(content=ft.Column([ft.Text("Average pollutant concentrations (city)"), ft.Divider()] + avg_rows), elevation=1))
+
+        self.page.update()
+
+    def _image_tabs(self, analysis):
+        """Tabs showing the PNGs written by HistoricalAnalyzer.generate_city_analysis."""
+        # the analyzer saved them under assets/plots and returned paths like 'plots/xxx.png'
         image_keys = [
             ('Yearly Trend', analysis.get('yearly_path')),
             ('Monthly Trend', analysis.get('monthly_path')),
@@ -101,7 +152,7 @@ class HistoricalView(ft.View):
             ('Most Toxic Pollutants', analysis.get('most_toxic_path')),
             ('Correlation Heatmap', analysis.get('heatmap_path')),
         ]
-        
+
         # --- TABS FOR 5 PLOTS ---
         tabs = []
         for title, relpath in image_keys:
@@ -121,31 +172,121 @@ class HistoricalView(ft.View):
                     )
                 )
                 tabs.append(tab)
+        return tabs
 
-        if tabs:
-            self.results.controls.append(
-                ft.Container(
-                    content=ft.Tabs(
-                        tabs=tabs,
-                        selected_index=0,
-                        expand=False
-                    ),
-                    height=600
-                )
-            )
+    def _chart_tabs(self, analysis):
+        """Tabs drawn with Flet chart controls from HistoricalAnalyzer.generate_city_series."""
+        labels = analysis.get('pollutants', [])
+        month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
-        # Show peak months table
-        peak = analysis.get('peak_months', {})
-        if peak:
-            rows = []
-            for p, m in peak.items():
-                rows.append(ft.Row([ft.Text(p), ft.Text(str(m))], alignment=ft.MainAxisAlignment.SPACE_BETWEEN))
-            self.results.controls.append(ft.Card(content=ft.Column([ft.Text("Peak month per pollutant"), ft.Divider()] + rows), elevation=1))
+        tabs = []
+        for title, key, fmt in [
+            ('Yearly Trend', 'yearly', lambda v: str(int(v))),
+            ('Monthly Trend', 'monthly', lambda v: month_names[int(v) - 1]),
+            ('Hourly Pattern', 'hourly', lambda v: f"{int(v):02d}"),
+        ]:
+            series = analysis.get(key)
+            if series is not None and len(series['index']):
+                tabs.append(ft.Tab(text=title, content=self._line_chart(series['index'], series['values'], labels, fmt)))
+
+        timeline = analysis.get('timeline')
+        if timeline is not None and len(timeline['index']):
+            # x is hours since the first point, so the downsampled points keep their spacing in time
+            start = timeline['index'][0].astype('datetime64[h]')
+            hours = (timeline['index'].astype('datetime64[h]') - start).astype(float)
+            tabs.append(ft.Tab(
+                text='Full History',
+                content=self._line_chart(hours, timeline['values'], labels,
+                                         lambda v: str((start + int(v)).astype('datetime64[D]')), n_ticks=6)
+            ))
 
-        # Show average pollutant values
         avg = analysis.get('avg_pollutants', {})
         if avg:
-            avg_rows = [ft.Row([ft.Text(k), ft.Text(f"{v:.2f}")], alignment=ft.MainAxisAlignment.SPACE_BETWEEN) for k, v in avg.items()]
-            self.results.controls.append(ft.Card(content=ft.Column([ft.Text("Average pollutant concentrations (city)"), ft.Divider()] + avg_rows), elevation=1))
+            tabs.append(ft.Tab(text='Most Toxic Pollutants', content=self._bar_chart(avg)))
+
+        corr = analysis.get('correlation')
+        if corr is not None:
+            tabs.append(ft.Tab(text='Correlation Heatmap', content=self._corr_grid(corr['labels'], corr['matrix'])))
+        return tabs
+
+    def _line_chart(self, index, values, labels, fmt, n_ticks=12, max_points=1000):
+        """One line per pollutant column of `values` over `index`, each reduced to at most max_points (LTTB)."""
+        from Backend_core.downsample import downsample
+
+        xs = [float(x) for x in index]
+        lines = []
+        for j, name in enumerate(labels):
+            px, py = downsample(index, values[:, j], max_points)
+            points = [ft.LineChartDataPoint(float(x), float(y)) for x, y in zip(px, py) if y == y]
+            if points:
+                lines.append(ft.LineChartData(
+                    data_points=points,
+                    stroke_width=2,
+                    color=SERIES_COLORS[j % len(SERIES_COLORS)],
+                    curved=False
+                ))
+
+        step = max(1, len(xs) // n_ticks)
+        bottom = ft.ChartAxis(
+            labels=[ft.ChartAxisLabel(value=x, label=ft.Text(fmt(x), size=10)) for x in xs[::step]],
+            labels_size=24
+        )
+        legend = ft.Row(
+            [ft.Row([ft.Container(width=10, height=10, bgcolor=SERIES_COLORS[j % len(SERIES_COLORS)]), ft.Text(name, size=11)], spacing=4)
+             for j, name in enumerate(labels)],
+            wrap=True, spacing=12
+        )
+        chart = ft.LineChart(
+            data_series=lines,
+            left_axis=ft.ChartAxis(labels_size=40),
+            bottom_axis=bottom,
+            horizontal_grid_lines=ft.ChartGridLines(width=0.5, color=ft.Colors.with_opacity(0.2, ft.Colors.ON_SURFACE)),
+            expand=True
+        )
+        return ft.Container(content=ft.Column([legend, chart], expand=True), padding=20, height=500)
+
+    def _bar_chart(self, avg):
+        """Bar per pollutant, sorted by average concentration."""
+        items = list(avg.items())
+        groups = [
+            ft.BarChartGroup(x=i, bar_rods=[ft.BarChartRod(
+                from_y=0, to_y=float(v), width=18,
+                color=SERIES_COLORS[i % len(SERIES_COLORS)],
+                tooltip=f"{k}: {v:.2f}", border_radius=2
+            )])
+            for i, (k, v) in enumerate(items)
+        ]
+        chart = ft.BarChart(
+            bar_groups=groups,
+            left_axis=ft.ChartAxis(labels_size=40),
+            bottom_axis=ft.ChartAxis(
+                labels=[ft.ChartAxisLabel(value=i, label=ft.Text(k, size=10)) for i, (k, _) in enumerate(items)],
+                labels_size=24
+            ),
+            expand=True
+        )
+        return ft.Container(content=chart, padding=20, height=500)
+
+    def _corr_grid(self, labels, matrix):
+        """Correlation matrix as a grid of coloured cells (blue = -1, red = +1)."""
+        def cell_color(v):
+            if v != v:
+                return ft.Colors.GREY_800
+            shade = min(9, int(abs(v) * 9)) * 100 or 50
+            return getattr(ft.Colors, f"{'RED' if v >= 0 else 'BLUE'}_{shade}")
 
-        self.page.update()
\ No newline at end of file
+        header = ft.Row([ft.Container(width=64)] + [
+            ft.Container(content=ft.Text(l, size=10), width=48, alignment=ft.alignment.center) for l in labels
+        ], spacing=2)
+        rows = [header]
+        for i, name in enumerate(labels):
+            cells = [ft.Container(content=ft.Text(name, size=10), width=64)]
+            for j in range(len(labels)):
+                v = float(matrix[i, j])
+                cells.append(ft.Container(
+                    content=ft.Text("" if v != v else f"{v:.2f}", size=10, color=ft.Colors.BLACK),
+                    width=48, height=28, bgcolor=cell_color(v),
+                    alignment=ft.alignment.center
+                ))
+            rows.append(ft.Row(cells, spacing=2))
+        return ft.Container(content=ft.Column(rows, spacing=2, scroll=ft.ScrollMode.AUTO), padding=20)